@@ -0,0 +1,114 @@
+# 按时间段解码音频：用 ffmpeg 的输入端 -ss/-t 只读取需要的区间，而不是整段解码。
+# 相邻分句的区间会合并成一次较大的读取，减少 ffmpeg 进程启动次数。
+# 解码结果统一为 44.1kHz / 16bit / 立体声 PCM，可直接交给 pygame.mixer.Sound。
+
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from pydub import AudioSegment
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+SAMPLE_WIDTH = 2
+
+MAX_GAP_MS = 2000      # 两段间隔小于此值则合并为一次读取
+MAX_SPAN_MS = 30000    # 单次读取的最长时长，首句的响应时间取决于它
+MAX_CHUNKS = 8         # 每个文件最多缓存的已解码区块数
+
+# 未指定 executor 的 RangeReader 共用的后台解码线程
+_decode_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="decode")
+
+
+def decode_range(path, start_ms, duration_ms):
+    """只解码 [start_ms, start_ms + duration_ms)；超出文件末尾的部分会被截短"""
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error",
+        "-ss", f"{max(0, start_ms) / 1000:.3f}",
+        "-t", f"{max(0, duration_ms) / 1000:.3f}",
+        "-i", str(path),
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", str(CHANNELS), "-ar", str(SAMPLE_RATE),
+        "-",
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed on {path}: {result.stderr.decode(errors='ignore').strip()}")
+    return AudioSegment(data=result.stdout, sample_width=SAMPLE_WIDTH, frame_rate=SAMPLE_RATE, channels=CHANNELS)
+
+
+def coalesce(ranges, max_gap_ms=MAX_GAP_MS, max_span_ms=MAX_SPAN_MS):
+    """
+    把按时间排序的 [(start_ms, end_ms)] 合并成较大的读取区块。
+    返回 (chunks, chunk_of)：chunks 为 [(start_ms, end_ms)]，chunk_of[i] 为第 i 段所在区块。
+    单段本身超过 max_span_ms 时独占一个区块。
+    """
+    chunks, chunk_of = [], []
+    for start, end in ranges:
+        if chunks:
+            c_start, c_end = chunks[-1]
+            if c_start <= start and start - c_end <= max_gap_ms and max(end, c_end) - c_start <= max_span_ms:
+                chunks[-1] = (c_start, max(end, c_end))
+                chunk_of.append(len(chunks) - 1)
+                continue
+        chunks.append((start, end))
+        chunk_of.append(len(chunks) - 1)
+    return chunks, chunk_of
+
+
+class RangeReader:
+    """
+    一个文件内多个时间段的按需解码器。get(i) 返回第 i 段的音频，
+    只解码它所在的区块；区块按最近使用保留 max_chunks 个。
+    executor 为解码用的线程池，默认是共用的 2 线程后台池。
+    """
+
+    def __init__(self, path, ranges, max_gap_ms=MAX_GAP_MS, max_span_ms=MAX_SPAN_MS, max_chunks=MAX_CHUNKS,
+                 executor=None):
+        self.path = path
+        self.ranges = ranges
+        self.chunks, self.chunk_of = coalesce(ranges, max_gap_ms, max_span_ms)
+        self.max_chunks = max_chunks
+        self.executor = executor or _decode_pool
+        self.futures = OrderedDict()  # chunk index -> Future[AudioSegment]
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def _chunk_future(self, chunk_idx):
+        with self.lock:
+            future = self.futures.get(chunk_idx)
+            if future is None:
+                start, end = self.chunks[chunk_idx]
+                future = self.executor.submit(decode_range, self.path, start, end - start)
+                self.futures[chunk_idx] = future
+                while len(self.futures) > self.max_chunks:
+                    self.futures.popitem(last=False)
+            else:
+                self.futures.move_to_end(chunk_idx)
+            return future
+
+    def prefetch(self, i):
+        """在后台解码第 i 段所在的区块 (已缓存则什么也不做)"""
+        if 0 <= i < len(self.ranges):
+            self._chunk_future(self.chunk_of[i])
+
+    def get(self, i):
+        chunk_idx = self.chunk_of[i]
+        future = self._chunk_future(chunk_idx)
+        try:
+            chunk = future.result()
+        except Exception:
+            # 解码失败不缓存，下次重新尝试
+            with self.lock:
+                if self.futures.get(chunk_idx) is future:
+                    del self.futures[chunk_idx]
+            raise
+        # 下一段若落在另一个区块，顺手开始预解码
+        if i + 1 < len(self.ranges) and self.chunk_of[i + 1] != chunk_idx:
+            self.prefetch(i + 1)
+        chunk_start = self.chunks[chunk_idx][0]
+        start, end = self.ranges[i]
+        return chunk[start - chunk_start:end - chunk_start]
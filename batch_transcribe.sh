@@ -1,16 +1,25 @@
 #!/usr/bin/env bash
 # batch_transcribe.sh — 批量转录文件夹中的所有 MP3 文件
-# 用法: ./batch_transcribe.sh <mp3文件夹路径>
+# 用法: ./batch_transcribe.sh <mp3文件夹路径> [目标实时率]
+# 若已运行 calibrate_whisper.py，会按本机档案选择满足目标实时率的模型与线程配置
+# 每个文件的运行统计写入 metrics/；设置 METRICS_PROM_FILE 可额外输出 Prometheus textfile
+# 分句规则可用环境变量调整 (0 = 不限制)：MAX_DURATION 秒、MAX_PAUSE 秒、MAX_CHARS 字符
+# 默认 15 秒 / 停顿 1.5 秒即断句；MAX_DURATION=0 MAX_PAUSE=0 恢复只按句末标点断句
 
 set -euo pipefail
 
 # ── 参数检查 ──────────────────────────────────────────────
 if [[ $# -lt 1 ]]; then
-    echo "用法: $0 <mp3文件夹路径>"
+    echo "用法: $0 <mp3文件夹路径> [目标实时率]"
     exit 1
 fi
 
 FOLDER="$1"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+
+# 让内嵌脚本可以导入同目录下的 calibrate_whisper.py / whisper_metrics.py / srt_core.py
+export PYTHONPATH="$SCRIPT_DIR${PYTHONPATH:+:$PYTHONPATH}"
+export TARGET_RTF="${2:-${TARGET_RTF:-}}"
 
 if [[ ! -d "$FOLDER" ]]; then
     echo "❌ 错误：'$FOLDER' 不是一个有效的文件夹。"
@@ -28,58 +37,72 @@ TRANSCRIBE_PY=$(cat <<'EOF'
 
 import os
 import sys
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
+from whisper_metrics import RunMetrics
+from srt_core import SegmentRules, build_sentences, format_timestamp, write_srt
+from calibrate_whisper import DEFAULT_TARGET_RTF, MODEL_DIR, load_profile, pick_config
 
 MODEL_SIZE   = "large-v3"
 DEVICE       = "cpu"
 COMPUTE_TYPE = "int8"
 
-def is_sentence_end(word_text):
-    end_chars = {'.', '?', '!', '。', '？', '！', '…'}
-    clean = word_text.strip()
-    return bool(clean) and clean[-1] in end_chars
-
-def format_timestamp(seconds):
-    ms = int((seconds % 1) * 1000)
-    s  = int(seconds)
-    m, s = divmod(s, 60)
-    h, m = divmod(m, 60)
-    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+def load_model():
+    profile = load_profile()
+    best = pick_config(profile, float(os.environ.get("TARGET_RTF") or DEFAULT_TARGET_RTF)) if profile else None
+    if best is None:
+        print(f"🚀 正在加载模型 ({MODEL_SIZE}) on {DEVICE}...")
+        return WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE,
+                            download_root=str(MODEL_DIR))
+    print(f"🚀 正在加载模型 ({best['model_size']}/{best['compute_type']}, {best['cpu_threads']} 线程) "
+          f"on {best['device']}，按本机档案 (RTF {best['rtf']:.3f})...")
+    return WhisperModel(best["model_size"], device=best["device"], compute_type=best["compute_type"],
+                        cpu_threads=best["cpu_threads"], num_workers=best["num_workers"],
+                        download_root=str(MODEL_DIR))
+
+def segment_rules():
+    default = SegmentRules()
+    def env(name, fallback):
+        return float(os.environ.get(name) or fallback)
+    return SegmentRules(round(env("MAX_DURATION", default.max_duration_ms / 1000) * 1000),
+                        round(env("MAX_PAUSE", default.max_pause_ms / 1000) * 1000),
+                        int(env("MAX_CHARS", default.max_chars)))
 
 def main():
     audio_file = sys.argv[1]
-
-    print(f"🚀 正在加载模型 ({MODEL_SIZE}) on {DEVICE}...")
-    model = WhisperModel(MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE)
+    metrics = RunMetrics(audio_file, prom_file=os.environ.get("METRICS_PROM_FILE") or None)
+    try:
+        transcribe(audio_file, metrics)
+    except BaseException:
+        metrics.close("error")
+        raise
+    metrics.close()
+    print(f"📊 运行统计: {metrics.path}")
+
+def transcribe(audio_file, metrics):
+    with metrics.stage("model_load"):
+        model = load_model()
 
     print("🎙️ 正在转录...")
-    segments, info = model.transcribe(audio_file, beam_size=5, word_timestamps=True, vad_filter=True)
+    sampling_rate = model.feature_extractor.sampling_rate
+    with metrics.stage("audio_decode"):
+        audio = decode_audio(audio_file, sampling_rate=sampling_rate)
+    metrics.set_audio_duration(len(audio) / sampling_rate)
+
+    # VAD + 特征提取 + 语言检测 (含一次编码器前向)
+    with metrics.stage("prepare"):
+        segments, info = model.transcribe(audio, beam_size=5, word_timestamps=True, vad_filter=True)
     print(f"检测语言: {info.language} (置信度: {info.language_probability:.2f})")
     print("-" * 50)
 
-    sentences, current_words = [], []
-    for segment in segments:
-        for word in segment.words:
-            current_words.append(word)
-            if is_sentence_end(word.word):
-                start = current_words[0].start
-                end   = current_words[-1].end
-                text  = "".join(w.word for w in current_words).strip()
-                sentences.append({"start": start, "end": end, "text": text})
-                print(f"[{format_timestamp(start)} --> {format_timestamp(end)}] {text}")
-                current_words = []
-
-    if current_words:
-        start = current_words[0].start
-        end   = current_words[-1].end
-        text  = "".join(w.word for w in current_words).strip()
-        sentences.append({"start": start, "end": end, "text": text})
-        print(f"[{format_timestamp(start)} --> {format_timestamp(end)}] {text}")
+    with metrics.stage("inference"):
+        sentences = []
+        for start, end, text in build_sentences(metrics.count_audio(segments), segment_rules()):
+            print(f"[{format_timestamp(start)} → {format_timestamp(end)}] {text}")
+            sentences.append((start, end, text))
 
     srt_path = os.path.splitext(audio_file)[0] + ".srt"
-    with open(srt_path, "w", encoding="utf-8") as f:
-        for i, s in enumerate(sentences, 1):
-            f.write(f"{i}\n{format_timestamp(s['start'])} --> {format_timestamp(s['end'])}\n{s['text']}\n\n")
+    with metrics.stage("srt_write"):
+        write_srt(srt_path, sentences)
 
     print("-" * 50)
     print(f"✅ 处理完成！字幕已保存为: {srt_path}")
@@ -0,0 +1,153 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "pysrt",
+# ]
+# ///
+# srt_core 的自检与基准测试：
+#   1. 随机生成字幕做往返检查 (写出 → 读回必须完全一致，时间戳格式化 / 解析互为逆运算)
+#      以及分句检查 (build_sentences 的时长 / 字符限额是真正的上限，且不丢词)
+#   2. 在 10 万条字幕的文件上对比 srt_core 与 pysrt 的读写速度
+# 用法: uv run bench_srt.py [--cues 100000] [--rounds 200] [--check-only]
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+import pysrt
+
+from srt_core import SegmentRules, build_sentences, format_timestamp, parse_timestamp, read_srt, iter_srt, write_srt
+
+WORDS = ["hello", "world", "wie", "geht's", "你好", "世界", "ça", "va", "42", "-", "I'm", "fine."]
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def expect(ok, message):
+    """不用 assert：python -O 下也要照常检查"""
+    if not ok:
+        raise CheckFailed(message)
+
+
+def random_cues(rng, n):
+    cues, t = [], rng.randint(0, 5000)
+    for _ in range(n):
+        start = t + rng.randint(0, 3000)
+        end = start + rng.randint(0, 15000)
+        lines = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+                 for _ in range(rng.randint(1, 3))]
+        cues.append((start, end, "\n".join(lines)))
+        t = end
+    return cues
+
+
+def check_roundtrip(rounds, seed=0):
+    rng = random.Random(seed)
+    for _ in range(rounds * 50):
+        ms = rng.randint(0, 100 * 3600 * 1000 - 1)
+        expect(parse_timestamp(format_timestamp(ms)) == ms, f"时间戳往返不一致: {ms} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "roundtrip.srt")
+        for _ in range(rounds):
+            cues = random_cues(rng, rng.randint(0, 40))
+            expect(write_srt(path, cues) == len(cues), "write_srt 返回的条数不对")
+            expect(read_srt(path) == cues, f"读回的字幕与写出的不一致 ({len(cues)} 条)")
+            # pysrt 读我们写出的文件也应得到相同内容
+            expect([(s.start.ordinal, s.end.ordinal, s.text) for s in pysrt.open(path)] == cues,
+                   "pysrt 读回的内容与写出的不一致")
+    print(f"✅ 往返检查通过 ({rounds} 组随机字幕, {rounds * 50} 个随机时间戳)")
+
+
+def words_segment(spec):
+    """[(word, start_s, end_s)] → 一个带 words 的 faster-whisper 风格 segment"""
+    return SimpleNamespace(words=[SimpleNamespace(word=w, start=a, end=b) for w, a, b in spec])
+
+
+def check_sentences(rounds, seed=0):
+    # 软断点切开后，剩余部分加上新词仍超长时必须再硬切
+    spec = [(" a", 0, 0.5), (" b,", 0.5, 1), (" c", 1, 9), (" d", 9, 17), (" e", 17, 18)]
+    got = list(build_sentences([words_segment(spec)]))
+    expect(got == [(0, 1000, "a b,"), (1000, 9000, "c"), (9000, 18000, "d e")], f"软断点后未硬切: {got}")
+
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        rules = SegmentRules(rng.choice([0, 3000, 15000]), rng.choice([0, 500, 1500]), rng.choice([0, 20, 80]))
+        spec, t = [], 0.0
+        for _ in range(rng.randint(0, 200)):
+            start = t + rng.choice([0, 0, 0.1, 0.3, 2.0])
+            end = start + rng.randint(50, 4000) / 1000
+            spec.append((" " + rng.choice(WORDS) + rng.choice(["", "", "", ",", "."]), start, end))
+            t = end
+        sentences = list(build_sentences([words_segment(spec)], rules))
+        expect(" ".join(text for _, _, text in sentences).split() == "".join(w for w, _, _ in spec).split(),
+               f"分句后丢词或多词: {rules}")
+        for start, end, text in sentences:
+            single = len(text.split()) == 1   # 单个词本身超限时无法再切
+            expect(single or not rules.max_duration_ms or end - start <= rules.max_duration_ms,
+                   f"句子超过最长时长 {rules}: {(start, end, text)}")
+            expect(single or not rules.max_chars or len(text) <= rules.max_chars,
+                   f"句子超过字符上限 {rules}: {(start, end, text)}")
+    print(f"✅ 分句检查通过 ({rounds} 组随机词序列)")
+
+
+def timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<32}{elapsed:>8.3f}s")
+    return elapsed, result
+
+
+def benchmark(n):
+    cues = random_cues(random.Random(1), n)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.srt")
+        print(f"\n⏱️  {n} 条字幕 ({n / 1000:.0f}k)")
+
+        core_write, _ = timed("srt_core.write_srt", lambda: write_srt(path, cues))
+        size_mb = os.path.getsize(path) / 2**20
+
+        def pysrt_write():
+            subs = pysrt.SubRipFile(items=[
+                pysrt.SubRipItem(i, pysrt.SubRipTime.from_ordinal(s), pysrt.SubRipTime.from_ordinal(e), t)
+                for i, (s, e, t) in enumerate(cues, 1)
+            ])
+            subs.save(path + ".pysrt", encoding="utf-8")
+        py_write, _ = timed("pysrt.save", pysrt_write)
+
+        core_read, _ = timed("srt_core.read_srt", lambda: read_srt(path))
+        stream_read, _ = timed("srt_core.iter_srt (streaming)", lambda: sum(1 for _ in iter_srt(path)))
+        py_read, _ = timed("pysrt.open", lambda: pysrt.open(path))
+
+    print("─" * 48)
+    print(f"  文件大小 {size_mb:.1f} MB")
+    print(f"  读取加速 {py_read / core_read:.1f}×   写入加速 {py_write / core_write:.1f}×")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="srt_core 往返自检 + 与 pysrt 的基准对比")
+    parser.add_argument("--cues", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--check-only", action="store_true", help="只做往返检查，不跑基准测试")
+    args = parser.parse_args()
+
+    try:
+        check_roundtrip(args.rounds)
+        check_sentences(args.rounds)
+    except CheckFailed as e:
+        print(f"❌ 检查失败: {e}")
+        sys.exit(1)
+    if not args.check_only:
+        benchmark(args.cues)
+
+
+if __name__ == "__main__":
+    main()
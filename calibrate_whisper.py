@@ -0,0 +1,184 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "faster-whisper",
+# ]
+# ///
+# 在本机上对已下载的 Whisper 模型做基准测试，生成每台主机的性能档案 (profiles/<主机名>.json)。
+# transcribe_whisper.py --auto 与 batch_transcribe.sh 会读取该档案自动选择配置。
+# 用法: uv run calibrate_whisper.py <短音频样本> [--device cpu] [--models small medium]
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import itertools
+import multiprocessing
+from pathlib import Path
+
+from whisper_metrics import peak_rss_bytes
+
+# ─────────────────────────────────────────────
+#  Constants
+# ─────────────────────────────────────────────
+
+BASE_DIR    = Path(__file__).resolve().parent
+MODEL_DIR   = BASE_DIR / "models"
+PROFILE_DIR = BASE_DIR / "profiles"
+
+# 由低到高的精度排序，用于在满足目标实时率的配置中挑选最准确的模型
+QUALITY_ORDER = ["tiny", "base", "small", "medium", "turbo", "large-v2", "large-v3"]
+
+COMPUTE_TYPES = {
+    "cpu":  ["int8", "float32"],
+    "cuda": ["float16", "int8_float16"],
+}
+
+NUM_WORKERS = [1, 2]
+
+DEFAULT_TARGET_RTF = 0.5   # 转录耗时不超过音频时长的一半
+
+# ─────────────────────────────────────────────
+#  Profile
+# ─────────────────────────────────────────────
+
+def profile_path() -> Path:
+    return PROFILE_DIR / f"{platform.node() or 'default'}.json"
+
+def load_profile() -> dict | None:
+    path = profile_path()
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_profile(profile: dict) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = profile_path()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    return path
+
+def pick_config(profile: dict, target_rtf: float = DEFAULT_TARGET_RTF) -> dict | None:
+    """
+    在满足目标实时率的测试结果中，选精度最高的模型；同一模型下选最快的组合。
+    没有任何组合达标时退而求其次，返回最快的那一个。
+    """
+    trials = [t for t in profile.get("trials", []) if "rtf" in t]
+    if not trials:
+        return None
+    passing = [t for t in trials if t["rtf"] <= target_rtf]
+    if not passing:
+        return min(trials, key=lambda t: t["rtf"])
+    return min(passing, key=lambda t: (-QUALITY_ORDER.index(t["model_size"]), t["rtf"]))
+
+# ─────────────────────────────────────────────
+#  Benchmark
+# ─────────────────────────────────────────────
+
+def cached_models() -> list[str]:
+    return [m for m in QUALITY_ORDER if (MODEL_DIR / f"models--Systran--faster-whisper-{m}").exists()]
+
+def thread_options() -> list[int]:
+    cores = os.cpu_count() or 4
+    return sorted({max(1, cores // 2), cores})
+
+def _trial_worker(fixture: str, model_size: str, device: str, compute_type: str,
+                  cpu_threads: int, num_workers: int) -> dict:
+    """在独立子进程中运行，保证 peak RSS 只反映这一组配置"""
+    from faster_whisper import WhisperModel
+
+    started = time.perf_counter()
+    model = WhisperModel(model_size, device=device, compute_type=compute_type,
+                         cpu_threads=cpu_threads, num_workers=num_workers,
+                         download_root=str(MODEL_DIR))
+    load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    segments, info = model.transcribe(fixture, beam_size=5, word_timestamps=True, vad_filter=True)
+    for _ in segments:
+        pass
+    elapsed = time.perf_counter() - started
+
+    return {
+        "load_s":      round(load_s, 2),
+        "elapsed_s":   round(elapsed, 2),
+        "rtf":         round(elapsed / info.duration, 4),
+        "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+    }
+
+def run_trial(fixture: str, **settings) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes=1) as pool:
+        try:
+            result = pool.apply(_trial_worker, (fixture,), settings)
+        except Exception as e:
+            result = {"error": str(e)}
+    return {**settings, **result}
+
+def calibrate(fixture: str, device: str, models: list[str]) -> dict:
+    threads = thread_options() if device == "cpu" else [0]
+    grid = list(itertools.product(models, COMPUTE_TYPES[device], threads, NUM_WORKERS))
+    trials = []
+
+    for i, (model_size, compute_type, cpu_threads, num_workers) in enumerate(grid, 1):
+        label = f"{model_size:<10}{compute_type:<14}threads={cpu_threads:<3}workers={num_workers}"
+        print(f"  [{i:>2}/{len(grid)}] {label}", end="", flush=True)
+        trial = run_trial(fixture, model_size=model_size, device=device, compute_type=compute_type,
+                          cpu_threads=cpu_threads, num_workers=num_workers)
+        if "error" in trial:
+            print(f"  ❌ {trial['error']}")
+        else:
+            print(f"  RTF {trial['rtf']:.3f}  峰值内存 {trial['peak_rss_mb']:.0f} MB")
+        trials.append(trial)
+
+    return {
+        "host":      platform.node(),
+        "machine":   platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "device":    device,
+        "fixture":   os.path.basename(fixture),
+        "created":   time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "trials":    trials,
+    }
+
+# ─────────────────────────────────────────────
+#  Entry point
+# ─────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper 本机性能校准：测量实时率与峰值内存并保存主机档案。")
+    parser.add_argument("fixture", help="用于测试的短音频样本 (建议 30–60 秒)")
+    parser.add_argument("--device", choices=list(COMPUTE_TYPES), default="cpu")
+    parser.add_argument("--models", nargs="+", choices=QUALITY_ORDER,
+                        help="要测试的模型 (默认: models/ 下所有已下载的模型)")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                        help=f"目标实时率，仅用于展示推荐结果 (默认 {DEFAULT_TARGET_RTF})")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.fixture):
+        print(f"❌ 错误: 文件 '{args.fixture}' 不存在。")
+        sys.exit(1)
+
+    models = args.models or cached_models()
+    if not models:
+        print("❌ 错误: models/ 下没有已下载的模型，请先用 transcribe_whisper.py 下载，或通过 --models 指定。")
+        sys.exit(1)
+
+    print(f"\n  ⚙️  正在校准 {platform.node()} ({args.device})，共 {len(models)} 个模型…\n")
+    profile = calibrate(args.fixture, args.device, models)
+    path = save_profile(profile)
+
+    print("─" * 52)
+    best = pick_config(profile, args.target_rtf)
+    if best:
+        print(f"  推荐 (RTF ≤ {args.target_rtf}): {best['model_size']} / {best['compute_type']} / "
+              f"threads={best['cpu_threads']} / workers={best['num_workers']}  → RTF {best['rtf']:.3f}")
+    print(f"✅ 档案已保存至: {path}\n")
+
+
+if __name__ == "__main__":
+    main()
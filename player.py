@@ -3,20 +3,26 @@
 # requires-python = ">=3.10"
 # dependencies = [
 #     "pygame",
-#     "pysrt",
 #     "pydub",
 #     "pyperclip",
 # ]
 # ///
 
 import pygame
-import pysrt
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
 import sys
 import re
 import os
+import time
+import argparse
+import threading
 import pyperclip
+from audio_ranges import decode_range
+from segment_engine import SegmentFile, fade_clip, padded_range, remove_long_silence
+from review_store import ReviewStore
+from srt_core import iter_srt, read_srt
+from srt_index import SrtIndex
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # ==============================================================================
 # ⚙️ 全局配置区域 (Configuration)
@@ -25,6 +31,16 @@ class Config:
     # --- 1. 文件路径 ---
     AUDIO_FILE = "AUDIO_FILE.mp3"
     SRT_FILE = "SRT_FILE.srt"
+    AUDIO_EXTS = (".mp3", ".m4a", ".wav", ".flac", ".ogg", ".aac")
+
+    # 播放列表模式：最多同时保留几个已解码的文件 (当前 + 预加载的下一个 + 上一个)
+    PLAYLIST_MAX_RESIDENT = 3
+
+    # 复习进度库 (SM-2)：记录重播 / 隐藏字幕 / 导出，--review 模式按到期时间出题
+    REVIEW_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "review.db")
+    REVIEW_LIMIT = 50
+    # 复习模式下数字键对应的 SM-2 自评分: 1 忘了 / 2 困难 / 3 良好 / 4 轻松
+    REVIEW_GRADES = {pygame.K_1: 1, pygame.K_2: 3, pygame.K_3: 4, pygame.K_4: 5}
 
     # --- 2. 窗口与显示 ---
     WINDOW_WIDTH = 800
@@ -42,6 +58,12 @@ class Config:
     # --- 4. 音频参数 ---
     PADDING_MS = 100
     FADE_MS = 30       # 这是一个静态淡入淡出，用于片段首尾
+
+    # 按需解码：只用 ffmpeg 读取用到的时间段，相邻分句合并成一次读取
+    RANGE_MAX_GAP_MS = 2000     # 间隔小于此值的分句合并读取
+    RANGE_MAX_SPAN_MS = 30000   # 单次读取的最长时长
+    RANGE_MAX_CHUNKS = 8        # 每个文件最多缓存的已解码区块数
+    SOUND_CACHE = 4             # 每个文件保留的 pygame Sound 数 (当前句及附近)
     
     # 动态交叉淡入淡出参数，用于消除按键爆音
     REPLAY_FADEOUT_MS = 50  # 旧声音淡出时间 (越短越快，但太短会爆音，30-50ms最佳)
@@ -92,37 +114,229 @@ def wrap_text(text, font, max_width):
 def mask_text(text):
     return re.sub(r'\S', '-', text)
 
-def remove_long_silence(sound_clip):
+class Track(SegmentFile):
+    """播放用的 SegmentFile：按需解码的分句之外，再缓存最近几句的 pygame Sound"""
+
+    def __init__(self, audio_file, srt_file):
+        super().__init__(audio_file, srt_file, Config.PADDING_MS, Config.FADE_MS,
+                         Config.RANGE_MAX_GAP_MS, Config.RANGE_MAX_SPAN_MS, Config.RANGE_MAX_CHUNKS)
+        self.audio_hash = None  # 登记到复习进度库后赋值
+        self.sounds = OrderedDict()  # index -> pygame Sound，只保留最近几句
+        print(f"Indexing {len(self.segments)} segments: {os.path.basename(audio_file)}")
+
+    def sound(self, i):
+        """用于播放 (Pygame Sound)"""
+        if i not in self.sounds:
+            self.sounds[i] = pygame.mixer.Sound(buffer=self.clip(i).raw_data)
+            while len(self.sounds) > Config.SOUND_CACHE:
+                self.sounds.popitem(last=False)
+        self.sounds.move_to_end(i)
+        return self.sounds[i]
+
+    def source(self, i):
+        """(音频文件, 句序号, 音频哈希)"""
+        return self.audio_file, i, self.audio_hash
+
+class SegmentQueue:
     """
-    移除音频片段中过长的静音部分，并紧凑拼接。
-    不修改原对象，返回一个新的 AudioSegment。
+    跨文件的分句队列 (复习模式的到期分句、搜索模式的命中结果)。
+    只解码队列里的分句 (用 ffmpeg 按时间段读取)，下一句在后台线程提前解码。
+    rows 中每项需包含 audio_file / audio_hash / seg_index / start_ms / end_ms / text。
     """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.audio_file = "queue"
+        self.pending = {}  # index -> Future[(clip, sound)]
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="review")
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _decode(self, i):
+        row = self.rows[i]
+        start_ms, end_ms = padded_range(row["start_ms"], row["end_ms"], Config.PADDING_MS)
+        clip = fade_clip(decode_range(row["audio_file"], start_ms, end_ms - start_ms), Config.FADE_MS)
+        return clip, pygame.mixer.Sound(buffer=clip.raw_data)
+
+    def prefetch(self, i):
+        if 0 <= i < len(self.rows) and i not in self.pending:
+            self.pending[i] = self.executor.submit(self._decode, i)
+        # 只保留当前句附近的解码结果
+        for old in [k for k in self.pending if k < i - 1]:
+            del self.pending[old]
+
+    def text(self, i):
+        return self.rows[i]["text"]
+
+    def clip(self, i):
+        self.prefetch(i)
+        return self.pending[i].result()[0]
+
+    def sound(self, i):
+        self.prefetch(i)
+        sound = self.pending[i].result()[1]
+        self.prefetch(i + 1)
+        return sound
+
+    def source(self, i):
+        row = self.rows[i]
+        return row["audio_file"], row["seg_index"], row["audio_hash"]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def has_cues(srt_file):
+    """字幕里至少有一条分句 (纯音乐 / 静音的音频转录出的 .srt 是空的)；只读到第一条为止"""
     try:
-        # 动态计算静音阈值：比当前片段的平均响度低 16dB
-        thresh = sound_clip.dBFS - 16
-        
-        # split_on_silence 返回的是非静音片段的列表
-        chunks = split_on_silence(
-            sound_clip, 
-            min_silence_len=Config.SILENCE_MIN_LEN, 
-            silence_thresh=thresh, 
-            keep_silence=Config.SILENCE_KEEP
-        )
-        
-        if len(chunks) == 0:
-            return sound_clip # 如果没检测到（或者是纯静音），返回原片段
-            
-        # 将切碎的非静音片段重新拼起来
-        processed_clip = chunks[0]
-        for i in range(1, len(chunks)):
-            processed_clip += chunks[i]
-            
-        return processed_clip
-    except Exception as e:
-        print(f"Silence removal failed: {e}")
-        return sound_clip # 出错则返回原版
+        return next(iter_srt(srt_file), None) is not None
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def find_playlist(folder):
+    """按文件名排序，收集文件夹中有同名 .srt 且字幕非空的音频文件"""
+    pairs = []
+    for name in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(name)
+        srt_file = os.path.join(folder, stem + ".srt")
+        if ext.lower() in Config.AUDIO_EXTS and os.path.isfile(srt_file):
+            if has_cues(srt_file):
+                pairs.append((os.path.join(folder, name), srt_file))
+            else:
+                print(f"Skipping {name}: subtitle file has no segments")
+    return pairs
+
+class TrackLoader:
+    """
+    播放列表的预加载缓存。prefetch() 在后台线程读取下一个文件的字幕并解码开头的区块，切换时 get() 直接命中；
+    已解码的文件按最近使用顺序保留，超过 Config.PLAYLIST_MAX_RESIDENT 个时释放最旧的。
+    """
+
+    def __init__(self, playlist):
+        self.playlist = playlist
+        self.cache = OrderedDict()  # index -> Track
+        self.pending = {}           # index -> Future
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preload")
+
+    def __len__(self):
+        return len(self.playlist)
+
+    def prefetch(self, index):
+        if not 0 <= index < len(self.playlist):
+            return None
+        with self.lock:
+            if index in self.cache:
+                future = Future()
+                future.set_result(self.cache[index])
+                return future
+            if index not in self.pending:
+                self.pending[index] = self.executor.submit(self._load, index)
+            return self.pending[index]
+
+    def get(self, index):
+        """阻塞直到该文件解码完成"""
+        track = self.prefetch(index).result()
+        with self.lock:
+            if index in self.cache:
+                self.cache.move_to_end(index)
+        return track
+
+    def _load(self, index):
+        try:
+            track = Track(*self.playlist[index])
+            if len(track):
+                # 预先解码开头的区块，切换过去时可立即出声；失败留给播放时提示，不影响打开文件
+                try:
+                    track.sound(0)
+                except Exception as e:
+                    print(f"Preload failed: {e}")
+            with self.lock:
+                self.cache[index] = track
+                while len(self.cache) > Config.PLAYLIST_MAX_RESIDENT:
+                    self.cache.popitem(last=False)
+            return track
+        finally:
+            with self.lock:
+                self.pending.pop(index, None)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="按字幕分句循环播放音频。")
+    parser.add_argument("audio_file", nargs="?", default=Config.AUDIO_FILE, help="音频文件")
+    parser.add_argument("srt_file", nargs="?", help="字幕文件 (默认与音频同名的 .srt)")
+    parser.add_argument("--playlist", metavar="DIR",
+                        help="播放列表模式：依次播放文件夹中所有 音频+同名.srt，最后一句之后进入下一个文件")
+    parser.add_argument("--review", action="store_true",
+                        help="复习模式：从进度库中取出所有文件里已到期的分句，按 1–4 键自评")
+    parser.add_argument("--search", metavar="PHRASE",
+                        help="搜索模式：在字幕索引 (srt_index.py) 中查找短语，直接从第一条结果开始播放")
+    parser.add_argument("--limit", type=int, default=Config.REVIEW_LIMIT, help="复习 / 搜索模式最多的分句数")
+    return parser.parse_args()
+
+def resolve_playlist(args):
+    if args.playlist:
+        return find_playlist(args.playlist)
+    if args.srt_file:
+        return [(args.audio_file, args.srt_file)]
+    if args.audio_file == Config.AUDIO_FILE:
+        return [(Config.AUDIO_FILE, Config.SRT_FILE)]
+    return [(args.audio_file, os.path.splitext(args.audio_file)[0] + ".srt")]
+
+def search_rows(store, phrase, limit):
+    """
+    查字幕索引，把命中结果整理成 SegmentQueue 的行，并把命中的文件登记到进度库。
+    先增量更新索引 (只重新解析有变化的字幕)，保证句序号和时间戳与磁盘上的 .srt 一致。
+    """
+    index = SrtIndex()
+    try:
+        index.update()
+        hits = [hit for hit in index.search(phrase, limit)
+                if hit["audio_file"] and os.path.isfile(hit["audio_file"]) and os.path.isfile(hit["srt_file"])]
+    finally:
+        index.close()
+
+    hashes = {}
+    for hit in hits:
+        if hit["audio_file"] not in hashes:
+            try:
+                hashes[hit["audio_file"]] = store.register_file(hit["audio_file"], hit["srt_file"],
+                                                                read_srt(hit["srt_file"]))
+            except Exception as e:
+                print(f"Skipping hits in {hit['audio_file']}: {e}")
+                hashes[hit["audio_file"]] = None
+    return [{**dict(hit), "audio_hash": hashes[hit["audio_file"]]} for hit in hits
+            if hashes[hit["audio_file"]] is not None]
 
 def main():
+    args = parse_args()
+    store = ReviewStore(Config.REVIEW_DB)
+    if args.review:
+        queue_rows = store.due_segments(args.limit)
+        # 进度按音频哈希保存，文件被移走后这里记录的还是旧路径；重新打开该文件即可更新
+        missing = {row["audio_file"] for row in queue_rows if not os.path.isfile(row["audio_file"])}
+        if missing:
+            queue_rows = [row for row in queue_rows if row["audio_file"] not in missing]
+            for path in sorted(missing):
+                print(f"Skipping due segments of missing file (open it from its new location to relink): {path}")
+        if not queue_rows:
+            print("Nothing due for review.")
+            return
+        print(f"Review session: {len(queue_rows)} segments due")
+    elif args.search:
+        queue_rows = search_rows(store, args.search, args.limit)
+        if not queue_rows:
+            print(f"No hits for: {args.search}")
+            return
+        print(f"Search: {len(queue_rows)} hits for '{args.search}'")
+    else:
+        playlist = resolve_playlist(args)
+        if not playlist:
+            print("No audio + .srt pairs found.")
+            return
+
     # 1. 初始化 (关键：Pre_init 减小 Buffer 以降低延迟)
     # buffer=1024 比默认的 4096 响应更快，能减少操作时的迟滞感
     pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=1024)
@@ -143,42 +357,40 @@ def main():
         sub_font = pygame.font.SysFont(None, Config.FONT_SIZE_SUBTITLE)
 
     # 4. 加载界面
-    screen.fill(Config.COLOR_LOADING_BG)
-    loading_str = f"Processing audio..."
-    loading_text = ui_font.render(loading_str, True, Config.COLOR_LOADING_TEXT)
-    txt_rect = loading_text.get_rect(center=(Config.WINDOW_WIDTH // 2, Config.WINDOW_HEIGHT // 2))
-    screen.blit(loading_text, txt_rect)
-    pygame.display.flip()
-
-    # 5. 数据处理
-    try:
-        subs = pysrt.open(Config.SRT_FILE)
-        full_audio = AudioSegment.from_file(Config.AUDIO_FILE)
-        audio_len_ms = len(full_audio)
-        
-        audio_segments = [] # 用于播放 (Pygame Sound objects)
-        raw_clips = []      # 用于导出 (Pydub AudioSegment objects)        print(f"Processing {len(subs)} segments...")
-        print(f"Processing {len(subs)} segments...")
-        
-        for sub in subs:
-            start_ms = (sub.start.hours * 3600 + sub.start.minutes * 60 + sub.start.seconds) * 1000 + sub.start.milliseconds
-            end_ms = (sub.end.hours * 3600 + sub.end.minutes * 60 + sub.end.seconds) * 1000 + sub.end.milliseconds
-            
-            safe_start = max(0, start_ms - Config.PADDING_MS)
-            safe_end = min(audio_len_ms, end_ms + Config.PADDING_MS)
-            
-            clip = full_audio[safe_start:safe_end]
-            clip = clip.fade_in(Config.FADE_MS).fade_out(Config.FADE_MS)
-            
-            # 保存原始片段
-            raw_clips.append(clip)
+    def show_loading():
+        screen.fill(Config.COLOR_LOADING_BG)
+        loading_str = f"Processing audio..."
+        loading_text = ui_font.render(loading_str, True, Config.COLOR_LOADING_TEXT)
+        txt_rect = loading_text.get_rect(center=(Config.WINDOW_WIDTH // 2, Config.WINDOW_HEIGHT // 2))
+        screen.blit(loading_text, txt_rect)
+        pygame.display.flip()
 
-            # 保存播放对象
-            sound = pygame.mixer.Sound(buffer=clip.raw_data)
-            audio_segments.append(sound)
+    # 5. 数据处理 (播放列表：当前文件同步解码，下一个文件后台预加载；复习模式：逐句按需解码)
+    loader = None
+    track_idx = 0
+
+    def open_track(index):
+        """切换到第 index 个文件；未预加载完成时显示加载界面并等待"""
+        if not loader.prefetch(index).done():
+            show_loading()
+        new_track = loader.get(index)
+        loader.prefetch(index + 1)
+        if new_track.audio_hash is None:
+            new_track.audio_hash = store.register_file(new_track.audio_file, new_track.srt_file,
+                                                       new_track.segments)
+        return new_track
 
+    try:
+        if args.review or args.search:
+            show_loading()
+            track = SegmentQueue(queue_rows)
+        else:
+            loader = TrackLoader(playlist)
+            track = open_track(track_idx)
     except Exception as e:
         print(f"Error loading files: {e}")
+        if loader:
+            loader.shutdown()
         return
 
     # ==========================================================================
@@ -196,15 +408,42 @@ def main():
     running = True
     toast_end_time = 0
     toast_message = "" # 动态消息内容
-    
+    last_played = None # (音频哈希, 句序号)，用于只在切句时记录一次 play
+
+    def log_event(kind, value=None):
+        """把当前分句的操作写入复习进度库"""
+        if not len(track):
+            return
+        _, seg_index, digest = track.source(current_idx)
+        try:
+            store.log_event(digest, seg_index, kind, value)
+        except Exception as e:
+            print(f"Progress log failed: {e}")
+
     def play_sound(force_restart=True):
         """
         force_restart: 如果为True，则执行平滑切换逻辑（用于重播或切句）
         """
-        nonlocal active_channel_index
+        nonlocal active_channel_index, last_played, toast_message, toast_end_time, current_idx
         
-        if 0 <= current_idx < len(audio_segments):
-            target_sound = audio_segments[current_idx]
+        if 0 <= current_idx < len(track):
+            # 分句在切换时才用 ffmpeg 解码，文件损坏 / 被移走都可能在这里失败
+            while True:
+                try:
+                    target_sound = track.sound(current_idx)
+                    break
+                except Exception as e:
+                    print(f"Error loading segment: {e}")
+                    toast_message = "X Load Error!"
+                    toast_end_time = pygame.time.get_ticks() + 2000
+                    # 复习 / 搜索队列：跳过这一句，继续下一句
+                    if not isinstance(track, SegmentQueue) or current_idx >= len(track) - 1:
+                        return False
+                    current_idx += 1
+            _, seg_index, digest = track.source(current_idx)
+            if (digest, seg_index) != last_played:
+                last_played = (digest, seg_index)
+                log_event("play", target_sound.get_length())
             
             if force_restart:
                 # 策略：Ping-Pong 切换
@@ -223,6 +462,7 @@ def main():
                 # 注意：Pygame的 channel.unpause() 比较简单，这里我们主要处理重播逻辑
                 # 如果是解除暂停，通常使用 unpause
                 pygame.mixer.unpause()
+        return True
 
     # 初始播放
     play_sound(force_restart=True)
@@ -236,24 +476,27 @@ def main():
             
             elif event.type == pygame.KEYDOWN:
                 # [Ctrl+C / Cmd+C] 复制文本
-                if event.key == pygame.K_c and (event.mod & pygame.KMOD_CTRL or event.mod & pygame.KMOD_META):
-                    text_to_copy = subs[current_idx].text
+                if event.key == pygame.K_c and (event.mod & pygame.KMOD_CTRL or event.mod & pygame.KMOD_META) \
+                        and len(track):
+                    text_to_copy = track.text(current_idx)
                     pyperclip.copy(text_to_copy)
                     toast_message = "Copied Text!"
                     toast_end_time = pygame.time.get_ticks() + 1500
 
                 # [x] 导出音频
-                elif event.key == pygame.K_x:
+                elif event.key == pygame.K_x and len(track):
                     try:
                         # 构造文件名: id_原文件名
-                        base_name = os.path.basename(Config.AUDIO_FILE)
-                        # 使用 current_idx + 1 作为 id，格式化为 001_xxx.mp3 以便排序
-                        file_name = f"{current_idx + 1:03d}_{base_name}"
+                        audio_file, seg_index, _ = track.source(current_idx)
+                        base_name = os.path.basename(audio_file)
+                        # 使用 句序号 + 1 作为 id，格式化为 001_xxx.mp3 以便排序
+                        file_name = f"{seg_index + 1:03d}_{base_name}"
                         
                         # 导出
-                        original_clip = raw_clips[current_idx]
-                        clean_clip = remove_long_silence(original_clip)
+                        original_clip = track.clip(current_idx)
+                        clean_clip = remove_long_silence(original_clip, Config.SILENCE_MIN_LEN, Config.SILENCE_KEEP)
                         clean_clip.export(file_name, format="mp3")
+                        log_event("export")
                         
                         toast_message = f"Saved: {file_name}"
                         toast_end_time = pygame.time.get_ticks() + 2000
@@ -276,30 +519,71 @@ def main():
                     else:
                         # 3. 如果没播放也没暂停（说明播放完了） -> 重头播放
                         play_sound(force_restart=True)
+                        log_event("replay")
                         is_paused = False
                 
                 # [Up] 重播本句 (无爆音版)
                 elif event.key == pygame.K_UP:
                     play_sound(force_restart=True)
+                    log_event("replay")
                     is_paused = False
 
                 # [Down] 显隐字幕
                 elif event.key == pygame.K_DOWN:
                     show_subtitle = not show_subtitle
+                    if not show_subtitle:
+                        log_event("hide")
+
+                # [1-4] 复习模式：自评后进入下一句
+                elif args.review and event.key in Config.REVIEW_GRADES:
+                    _, seg_index, digest = track.source(current_idx)
+                    due = store.grade(digest, seg_index, Config.REVIEW_GRADES[event.key])
+                    days = (due - time.time()) / 86400 if due else 0
+                    toast_message = f"Next review in {days:.0f} day(s)"
+                    toast_end_time = pygame.time.get_ticks() + 1500
+                    if current_idx < len(track) - 1:
+                        current_idx += 1
+                        play_sound(force_restart=True)
+                        is_paused = False
+                    else:
+                        toast_message = "Review session done!"
+                        toast_end_time = pygame.time.get_ticks() + 3000
 
-                # [Right] 下一句
+                # [Right] 下一句 (最后一句之后进入播放列表的下一个文件)
                 elif event.key == pygame.K_RIGHT:
-                    if current_idx < len(subs) - 1:
+                    if current_idx < len(track) - 1:
                         current_idx += 1
                         play_sound(force_restart=True)
                         is_paused = False
+                    elif loader and track_idx < len(loader) - 1:
+                        try:
+                            track = open_track(track_idx + 1)
+                            track_idx += 1
+                            current_idx = 0
+                            play_sound(force_restart=True)
+                            is_paused = False
+                        except Exception as e:
+                            print(f"Error loading files: {e}")
+                            toast_message = "X Load Error!"
+                            toast_end_time = pygame.time.get_ticks() + 2000
                 
-                # [Left] 上一句
+                # [Left] 上一句 (第一句之前回到上一个文件的最后一句)
                 elif event.key == pygame.K_LEFT:
                     if current_idx > 0:
                         current_idx -= 1
                         play_sound(force_restart=True)
                         is_paused = False
+                    elif loader and track_idx > 0:
+                        try:
+                            track = open_track(track_idx - 1)
+                            track_idx -= 1
+                            current_idx = max(0, len(track) - 1)
+                            play_sound(force_restart=True)
+                            is_paused = False
+                        except Exception as e:
+                            print(f"Error loading files: {e}")
+                            toast_message = "X Load Error!"
+                            toast_end_time = pygame.time.get_ticks() + 2000
                 
                 # [R] 循环模式
                 elif event.key == pygame.K_r:
@@ -308,7 +592,9 @@ def main():
         # --- 播放逻辑 (自动循环) ---
         if not pygame.mixer.get_busy() and not is_paused:
             if is_looping:
-                play_sound(force_restart=True)
+                # 解码失败时关掉循环，否则每一帧都会重新调用 ffmpeg
+                if not play_sound(force_restart=True):
+                    is_looping = False
             else:
                 pass
 
@@ -316,12 +602,21 @@ def main():
         screen.fill(Config.COLOR_BG)
 
         # A. 状态栏
-        status_str = f"Seg: {current_idx+1}/{len(subs)} | Loop: {'ON' if is_looping else 'OFF'} | Subs: {'SHOW' if show_subtitle else 'HIDDEN'}"
+        status_str = f"Seg: {min(current_idx+1, len(track))}/{len(track)} | Loop: {'ON' if is_looping else 'OFF'} | Subs: {'SHOW' if show_subtitle else 'HIDDEN'}"
         status_surface = ui_font.render(status_str, True, Config.COLOR_STATUS_TEXT)
         screen.blit(status_surface, (20, 20))
-
-        # B. 字幕内容
-        raw_text = subs[current_idx].text
+        if args.review or args.search:
+            mode_str = "Review" if args.review else "Hit"
+            file_str = f"{mode_str}: {os.path.basename(track.source(current_idx)[0])} #{track.source(current_idx)[1] + 1}"
+            file_surface = ui_font.render(file_str, True, Config.COLOR_HINT_TEXT)
+            screen.blit(file_surface, (20, 50))
+        elif len(loader) > 1:
+            file_str = f"File: {track_idx+1}/{len(loader)} {os.path.basename(track.audio_file)}"
+            file_surface = ui_font.render(file_str, True, Config.COLOR_HINT_TEXT)
+            screen.blit(file_surface, (20, 50))
+
+        # B. 字幕内容 (字幕为空的文件没有分句可显示)
+        raw_text = track.text(current_idx) if len(track) else "(no segments)"
         
         if show_subtitle:
             display_text = raw_text
@@ -343,6 +638,8 @@ def main():
 
         # C. 操作提示
         hint_str = "[Space]:Pause [Up]:Replay [x]:Export Audio [Cmd+C]:Copy"
+        if args.review:
+            hint_str = "[1-4]:Again/Hard/Good/Easy [Up]:Replay [Down]:Hide [x]:Export"
         hint_surface = ui_font.render(hint_str, True, Config.COLOR_HINT_TEXT)
         screen.blit(hint_surface, (20, Config.WINDOW_HEIGHT - 30))
 
@@ -353,6 +650,8 @@ def main():
         pygame.display.flip()
         clock.tick(Config.FPS)
 
+    (loader or track).shutdown()
+    store.close()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,171 @@
+# 复习进度库：用 SQLite 记录每个分句 (音频哈希, 句序号) 的重播 / 隐藏字幕 / 导出次数，
+# 并用 SM-2 算法安排复习时间。跨文件组建复习队列时只查询索引，不需要加载任何音频。
+# 仅依赖标准库，由 player.py 使用。
+
+import os
+import time
+import sqlite3
+import hashlib
+
+DAY_S = 24 * 3600
+
+HASH_CHUNK = 1024 * 1024   # 只读文件首尾各 1 MiB，几小时的音频也能瞬间算出哈希
+
+# 学习者有过这些操作的分句才进入复习计划
+STUDY_EVENTS = {"replay", "hide", "export"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    audio_hash  TEXT PRIMARY KEY,
+    audio_file  TEXT NOT NULL,
+    srt_file    TEXT NOT NULL,
+    updated     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    audio_hash    TEXT NOT NULL,
+    seg_index     INTEGER NOT NULL,
+    start_ms      INTEGER NOT NULL,
+    end_ms        INTEGER NOT NULL,
+    text          TEXT NOT NULL,
+    plays         INTEGER NOT NULL DEFAULT 0,
+    replays       INTEGER NOT NULL DEFAULT 0,
+    hides         INTEGER NOT NULL DEFAULT 0,
+    exports       INTEGER NOT NULL DEFAULT 0,
+    last_seen     REAL,
+    easiness      REAL NOT NULL DEFAULT 2.5,
+    interval_days REAL NOT NULL DEFAULT 0,
+    repetitions   INTEGER NOT NULL DEFAULT 0,
+    due           REAL,
+    PRIMARY KEY (audio_hash, seg_index)
+);
+CREATE INDEX IF NOT EXISTS idx_segments_due ON segments (due) WHERE due IS NOT NULL;
+CREATE TABLE IF NOT EXISTS events (
+    audio_hash  TEXT NOT NULL,
+    seg_index   INTEGER NOT NULL,
+    kind        TEXT NOT NULL,
+    ts          REAL NOT NULL,
+    value       REAL
+);
+CREATE INDEX IF NOT EXISTS idx_events_segment ON events (audio_hash, seg_index);
+"""
+
+COUNTER_COLUMNS = {"play": "plays", "replay": "replays", "hide": "hides", "export": "exports"}
+
+
+def audio_hash(path):
+    """文件大小 + 首尾各 1 MiB 的 SHA-1；文件被移动或改名后仍能对应上原来的进度"""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(HASH_CHUNK))
+        if size > 2 * HASH_CHUNK:
+            f.seek(-HASH_CHUNK, os.SEEK_END)
+            digest.update(f.read(HASH_CHUNK))
+    return digest.hexdigest()
+
+
+def sm2(easiness, interval_days, repetitions, quality):
+    """
+    SM-2：quality 为 0–5 的自评分。低于 3 视为遗忘，从头开始；
+    否则间隔按 1 天 → 6 天 → 上次间隔 × 难度系数 递增。
+    返回 (easiness, interval_days, repetitions)。
+    """
+    if quality < 3:
+        repetitions = 0
+        interval_days = 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval_days = 1
+        elif repetitions == 2:
+            interval_days = 6
+        else:
+            interval_days = round(interval_days * easiness, 2)
+    easiness += 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    return max(1.3, easiness), interval_days, repetitions
+
+
+class ReviewStore:
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def register_file(self, audio_file, srt_file, segments):
+        """
+        登记一个文件及其分句 [(start_ms, end_ms, text), ...]，返回音频哈希。
+        字幕重新生成后，时间轴和文本都没变的分句保留复习进度；
+        同一序号对应的内容变了则按新分句重新计数、移出复习计划，
+        超出新分句数的旧序号直接删除。
+        """
+        digest = audio_hash(audio_file)
+        with self.db:
+            self.db.execute(
+                "INSERT INTO files (audio_hash, audio_file, srt_file, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (audio_hash) DO UPDATE SET audio_file = excluded.audio_file, "
+                "srt_file = excluded.srt_file, updated = excluded.updated",
+                (digest, os.path.abspath(audio_file), os.path.abspath(srt_file), time.time()),
+            )
+            self.db.executemany(
+                "INSERT INTO segments (audio_hash, seg_index, start_ms, end_ms, text) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (audio_hash, seg_index) DO UPDATE SET start_ms = excluded.start_ms, "
+                "end_ms = excluded.end_ms, text = excluded.text, "
+                "plays = 0, replays = 0, hides = 0, exports = 0, last_seen = NULL, "
+                "easiness = 2.5, interval_days = 0, repetitions = 0, due = NULL "
+                "WHERE (start_ms, end_ms, text) IS NOT (excluded.start_ms, excluded.end_ms, excluded.text)",
+                [(digest, i, start, end, text) for i, (start, end, text) in enumerate(segments)],
+            )
+            self.db.execute("DELETE FROM segments WHERE audio_hash = ? AND seg_index >= ?",
+                            (digest, len(segments)))
+        return digest
+
+    def log_event(self, digest, seg_index, kind, value=None):
+        """记录一次 play / replay / hide / export；后三者会把新分句加入复习计划 (立即到期)"""
+        now = time.time()
+        column = COUNTER_COLUMNS[kind]
+        with self.db:
+            self.db.execute(
+                "INSERT INTO events (audio_hash, seg_index, kind, ts, value) VALUES (?, ?, ?, ?, ?)",
+                (digest, seg_index, kind, now, value),
+            )
+            self.db.execute(
+                f"UPDATE segments SET {column} = {column} + 1, last_seen = ?, "
+                "due = CASE WHEN due IS NULL AND ? THEN ? ELSE due END "
+                "WHERE audio_hash = ? AND seg_index = ?",
+                (now, kind in STUDY_EVENTS, now, digest, seg_index),
+            )
+
+    def grade(self, digest, seg_index, quality):
+        """按 SM-2 更新该分句的间隔，返回下次到期的时间戳"""
+        row = self.db.execute(
+            "SELECT easiness, interval_days, repetitions FROM segments WHERE audio_hash = ? AND seg_index = ?",
+            (digest, seg_index),
+        ).fetchone()
+        if row is None:
+            return None
+        easiness, interval_days, repetitions = sm2(row["easiness"], row["interval_days"], row["repetitions"], quality)
+        due = time.time() + interval_days * DAY_S
+        with self.db:
+            self.db.execute(
+                "INSERT INTO events (audio_hash, seg_index, kind, ts, value) VALUES (?, ?, 'grade', ?, ?)",
+                (digest, seg_index, time.time(), quality),
+            )
+            self.db.execute(
+                "UPDATE segments SET easiness = ?, interval_days = ?, repetitions = ?, due = ? "
+                "WHERE audio_hash = ? AND seg_index = ?",
+                (easiness, interval_days, repetitions, due, digest, seg_index),
+            )
+        return due
+
+    def due_segments(self, limit=50, now=None):
+        """跨所有文件取出已到期的分句 (最早到期的在前)，只读索引，不碰音频"""
+        return self.db.execute(
+            "SELECT s.audio_hash, s.seg_index, s.start_ms, s.end_ms, s.text, s.due, f.audio_file "
+            "FROM segments s JOIN files f USING (audio_hash) "
+            "WHERE s.due IS NOT NULL AND s.due <= ? ORDER BY s.due LIMIT ?",
+            (time.time() if now is None else now, limit),
+        ).fetchall()
@@ -0,0 +1,91 @@
+# 无界面的分句引擎：按 (文件, 句序号) 取出切好的音频片段。
+# 负责读取字幕、按时间段解码、首尾余量、淡入淡出和导出用的长静音移除；
+# 不依赖 pygame，player.py 和 segment_server.py 共用。
+
+import io
+
+from pydub.silence import split_on_silence
+
+from audio_ranges import MAX_CHUNKS, MAX_GAP_MS, MAX_SPAN_MS, RangeReader
+from srt_core import read_srt
+
+PADDING_MS = 100   # 分句首尾各多取的余量
+FADE_MS = 30       # 片段首尾的静态淡入淡出
+
+# 静音移除参数 (导出专用)
+# 任何低于 dBFS-16 的声音被视为静音
+# 持续超过 400ms 的静音会被切掉
+# 切割后保留 100ms 的余量(keep_silence)，避免声音太突兀
+SILENCE_MIN_LEN = 400
+SILENCE_KEEP = 100
+
+
+def padded_range(start_ms, end_ms, padding_ms=PADDING_MS):
+    """分句加上首尾余量后的读取区间"""
+    return max(0, start_ms - padding_ms), end_ms + padding_ms
+
+def fade_clip(clip, fade_ms=FADE_MS):
+    return clip.fade_in(fade_ms).fade_out(fade_ms)
+
+def remove_long_silence(sound_clip, min_silence_len=SILENCE_MIN_LEN, keep_silence=SILENCE_KEEP):
+    """
+    移除音频片段中过长的静音部分，并紧凑拼接。
+    不修改原对象，返回一个新的 AudioSegment。
+    """
+    try:
+        # 动态计算静音阈值：比当前片段的平均响度低 16dB
+        thresh = sound_clip.dBFS - 16
+
+        # split_on_silence 返回的是非静音片段的列表
+        chunks = split_on_silence(
+            sound_clip,
+            min_silence_len=min_silence_len,
+            silence_thresh=thresh,
+            keep_silence=keep_silence
+        )
+
+        if len(chunks) == 0:
+            return sound_clip # 如果没检测到（或者是纯静音），返回原片段
+
+        # 将切碎的非静音片段重新拼起来
+        processed_clip = chunks[0]
+        for i in range(1, len(chunks)):
+            processed_clip += chunks[i]
+
+        return processed_clip
+    except Exception as e:
+        print(f"Silence removal failed: {e}")
+        return sound_clip # 出错则返回原版
+
+def encode_clip(clip, fmt="mp3", bitrate="128k"):
+    """把片段编码成 mp3 / wav 等格式的字节串"""
+    buf = io.BytesIO()
+    clip.export(buf, format=fmt, bitrate=bitrate if fmt == "mp3" else None)
+    return buf.getvalue()
+
+
+class SegmentFile:
+    """
+    一对音频 + 字幕。字幕一次读完，音频按需解码：取到哪一句才读取它所在的时间段
+    (相邻分句合并成一次 ffmpeg 读取)，因此打开几小时的长文件也无需等待整段解码。
+    executor 传给 RangeReader，决定 ffmpeg 解码在哪个线程池中进行。
+    """
+
+    def __init__(self, audio_file, srt_file, padding_ms=PADDING_MS, fade_ms=FADE_MS,
+                 max_gap_ms=MAX_GAP_MS, max_span_ms=MAX_SPAN_MS, max_chunks=MAX_CHUNKS, executor=None):
+        self.audio_file = audio_file
+        self.srt_file = srt_file
+        self.fade_ms = fade_ms
+        self.segments = read_srt(srt_file)   # [(start_ms, end_ms, text)]
+        self.reader = RangeReader(audio_file, [padded_range(start, end, padding_ms) for start, end, _ in self.segments],
+                                  max_gap_ms, max_span_ms, max_chunks, executor)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def text(self, i):
+        return self.segments[i][2]
+
+    def clip(self, i):
+        """第 i 句 (含余量和淡入淡出) 的 Pydub AudioSegment"""
+        return fade_clip(self.reader.get(i), self.fade_ms)
@@ -0,0 +1,254 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#     "aiohttp",
+#     "pydub",
+# ]
+# ///
+# 注意: 此脚本依赖系统安装的 ffmpeg，请确保 ffmpeg 已添加到环境变量
+#
+# 本地分句音频服务：把 player.py 的分句引擎 (segment_engine.py) 以 HTTP API 提供给浏览器端，
+# 多个学习者请求同一句时只解码 / 编码一次。
+#   GET /api/files                                   → 目录下所有 音频+同名.srt
+#   GET /api/segments?file=<相对路径>                 → 该文件的分句列表
+#   GET /api/audio?file=<相对路径>&index=N[&format=mp3|wav][&trim=1]
+#                                                    → 第 N 句的音频 (支持 ETag / If-None-Match)
+# 用法: uv run segment_server.py <音频文件夹> [--port 8765] [--cache-mb 256] [--decode-mb 256]
+
+import os
+import asyncio
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from audio_ranges import CHANNELS, MAX_SPAN_MS, SAMPLE_RATE, SAMPLE_WIDTH
+from segment_engine import FADE_MS, PADDING_MS, SegmentFile, encode_clip, remove_long_silence
+from srt_index import AUDIO_EXTS
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_MB = 256
+DEFAULT_DECODE_MB = 256
+FILE_MAX_CHUNKS = 2       # 每个文件保留的已解码区块数 (当前区块 + 预解码的下一块)
+
+# 一个区块最多 MAX_SPAN_MS 的 PCM (超长的单句除外)，据此由解码内存上限推出可同时打开的文件数
+CHUNK_BYTES = MAX_SPAN_MS * SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH // 1000
+
+CONTENT_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+
+
+class SegmentService:
+    """
+    解码与缓存层。编码后的片段字节按 LRU 缓存 (按总字节数限额)；
+    已解码的 PCM 区块按文件数限额：decode_bytes / (每个文件的区块数 × 区块大小)。
+    同一片段的并发请求共享同一次解码，解码 / 编码在线程池中进行，不阻塞事件循环。
+    ffmpeg 解码用单独的线程池：渲染线程会等待解码结果，共用一个池在满载时会互相卡死。
+    """
+
+    def __init__(self, root, cache_bytes, decode_bytes, workers):
+        self.root = Path(root).resolve()
+        self.cache_bytes = cache_bytes
+        self.max_open_files = max(1, decode_bytes // (FILE_MAX_CHUNKS * CHUNK_BYTES))
+        self.cache = OrderedDict()       # key -> bytes
+        self.cache_size = 0
+        self.inflight = {}               # key -> asyncio.Future
+        self.files = OrderedDict()       # audio path -> (stat 签名, SegmentFile)
+        self.files_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="segment")
+        self.decoder = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decode")
+
+    # ── 文件 ────────────────────────────────────────────
+
+    def resolve(self, rel):
+        """相对路径 → (音频, 字幕)；不允许跳出根目录"""
+        audio = (self.root / rel).resolve()
+        srt = audio.with_suffix(".srt")
+        if self.root not in audio.parents or audio.suffix.lower() not in AUDIO_EXTS:
+            raise web.HTTPNotFound(reason="unknown file")
+        if not audio.is_file() or not srt.is_file():
+            raise web.HTTPNotFound(reason="audio or srt missing")
+        return audio, srt
+
+    def list_files(self):
+        files = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in sorted(filenames):
+                path = Path(dirpath) / name
+                if path.suffix.lower() in AUDIO_EXTS and path.with_suffix(".srt").is_file():
+                    files.append(str(path.relative_to(self.root)))
+        return sorted(files)
+
+    def signature(self, audio, srt):
+        """音频和字幕的 (mtime, size)；文件变化后 ETag 和缓存自然失效"""
+        a, s = audio.stat(), srt.stat()
+        return a.st_mtime_ns, a.st_size, s.st_mtime_ns, s.st_size
+
+    def open_file(self, audio, srt, signature):
+        """在工作线程中调用：取出 (或重新建立) 该文件的 SegmentFile"""
+        key = str(audio)
+        with self.files_lock:
+            entry = self.files.get(key)
+            if entry and entry[0] == signature:
+                self.files.move_to_end(key)
+                return entry[1]
+        segment_file = SegmentFile(str(audio), str(srt), max_chunks=FILE_MAX_CHUNKS, executor=self.decoder)
+        with self.files_lock:
+            self.files[key] = (signature, segment_file)
+            self.files.move_to_end(key)
+            while len(self.files) > self.max_open_files:
+                self.files.popitem(last=False)
+        return segment_file
+
+    # ── 片段 ────────────────────────────────────────────
+
+    def etag(self, signature, index, fmt, trim):
+        raw = f"{signature}|{index}|{fmt}|{trim}|{PADDING_MS}|{FADE_MS}"
+        return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+    def _render(self, audio, srt, signature, index, fmt, trim):
+        segment_file = self.open_file(audio, srt, signature)
+        if not 0 <= index < len(segment_file):
+            raise IndexError(index)
+        clip = segment_file.clip(index)
+        if trim:
+            clip = remove_long_silence(clip)
+        return encode_clip(clip, fmt)
+
+    def _remember(self, key, future):
+        self.inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        data = future.result()
+        if len(data) > self.cache_bytes:
+            return
+        self.cache[key] = data
+        self.cache_size += len(data)
+        while self.cache_size > self.cache_bytes:
+            _, old = self.cache.popitem(last=False)
+            self.cache_size -= len(old)
+
+    async def segment_bytes(self, key, *render_args):
+        data = self.cache.get(key)
+        if data is not None:
+            self.cache.move_to_end(key)
+            return data
+        future = self.inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, self._render, *render_args)
+            self.inflight[key] = future
+            future.add_done_callback(lambda f: self._remember(key, f))
+        # shield：某个客户端断开时不取消其他人也在等的解码
+        return await asyncio.shield(future)
+
+    async def segments(self, audio, srt):
+        loop = asyncio.get_running_loop()
+        segment_file = await loop.run_in_executor(self.executor, self.open_file, audio, srt,
+                                                  self.signature(audio, srt))
+        return segment_file.segments
+
+
+# ─────────────────────────────────────────────
+#  HTTP
+# ─────────────────────────────────────────────
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 是逗号分隔的实体标签列表；按弱比较 (忽略 W/ 前缀)，* 匹配任何版本"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def make_app(service):
+    routes = web.RouteTableDef()
+
+    @routes.get("/api/files")
+    async def files(request):
+        loop = asyncio.get_running_loop()
+        return web.json_response(await loop.run_in_executor(service.executor, service.list_files))
+
+    @routes.get("/api/segments")
+    async def segments(request):
+        audio, srt = service.resolve(request.query.get("file", ""))
+        cues = await service.segments(audio, srt)
+        return web.json_response([
+            {"index": i, "start_ms": start, "end_ms": end, "text": text}
+            for i, (start, end, text) in enumerate(cues)
+        ])
+
+    @routes.get("/api/audio")
+    async def audio(request):
+        audio, srt = service.resolve(request.query.get("file", ""))
+        fmt = request.query.get("format", "mp3")
+        if fmt not in CONTENT_TYPES:
+            raise web.HTTPBadRequest(reason="format must be mp3 or wav")
+        try:
+            index = int(request.query["index"])
+        except (KeyError, ValueError):
+            raise web.HTTPBadRequest(reason="index is required")
+        trim = request.query.get("trim") in ("1", "true")
+
+        signature = service.signature(audio, srt)
+        etag = service.etag(signature, index, fmt, trim)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        # 条件请求：ETag 只由文件状态和参数决定，命中时无需解码
+        if etag_matches(request.headers.get("If-None-Match", ""), etag):
+            return web.Response(status=304, headers=headers)
+
+        try:
+            data = await service.segment_bytes(etag, audio, srt, signature, index, fmt, trim)
+        except IndexError:
+            raise web.HTTPNotFound(reason="segment index out of range")
+        return web.Response(body=data, content_type=CONTENT_TYPES[fmt], headers=headers)
+
+    @web.middleware
+    async def cors(request, handler):
+        # 浏览器端 (astro-player) 跨端口访问
+        cors_headers = {"Access-Control-Allow-Origin": "*", "Access-Control-Expose-Headers": "ETag"}
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            e.headers.update(cors_headers)
+            raise
+        except Exception as e:
+            # 其他错误 (如 ffmpeg 解码失败) 也要带 CORS 头，否则浏览器只会报跨域错误
+            print(f"❌ {request.path_qs}: {e!r}")
+            raise web.HTTPInternalServerError(headers=cors_headers) from e
+        response.headers.update(cors_headers)
+        return response
+
+    app = web.Application(middlewares=[cors])
+    app.add_routes(routes)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地分句音频服务：按 (文件, 句序号) 提供切好的音频。")
+    parser.add_argument("root", help="音频 + 同名 .srt 所在的文件夹")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_CACHE_MB, help="编码后片段的内存缓存上限 (MB)")
+    parser.add_argument("--decode-mb", type=int, default=DEFAULT_DECODE_MB,
+                        help="已解码 PCM 的内存上限 (MB)，决定可同时打开的文件数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="同时进行的 ffmpeg 解码数，编码线程数与之相同")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"❌ 错误: '{args.root}' 不是一个有效的文件夹。")
+        return
+
+    service = SegmentService(args.root, args.cache_mb * 2**20, args.decode_mb * 2**20, args.workers)
+    print(f"🎧 分句音频服务: http://{args.host}:{args.port}/api/files  (根目录 {service.root})")
+    print(f"   片段缓存 {args.cache_mb} MB，解码缓存 {args.decode_mb} MB (最多 {service.max_open_files} 个文件)")
+    web.run_app(make_app(service), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# 字幕 / 时间戳公共库：SRT 流式读写、Whisper 词级结果的分句、时间戳换算。
+# transcribe_whisper.py、batch_transcribe.sh、player.py、srt_index.py 共用，仅依赖标准库。
+#
+# 一条字幕 (cue) 就是一个元组 (start_ms, end_ms, text)，时间一律为整数毫秒，
+# 不为每个字段创建对象，几十万条的字幕文件也能快速读写。
+
+import os
+from dataclasses import dataclass
+
+SENTENCE_END_CHARS = {'.', '?', '!', '。', '？', '！', '…'}
+
+# 超长时优先在这些字符之后断开，而不是硬切在限额处
+SOFT_BREAK_CHARS = {',', ';', ':', '，', '；', '：', '、'}
+
+# ─────────────────────────────────────────────
+#  Timestamps
+# ─────────────────────────────────────────────
+
+def seconds_to_ms(seconds: float) -> int:
+    return max(0, round(seconds * 1000))
+
+def format_timestamp(ms: int) -> str:
+    """毫秒 → SRT 时间戳 HH:MM:SS,mmm"""
+    s, ms = divmod(max(0, int(ms)), 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+
+def parse_timestamp(text: str) -> int:
+    """SRT 时间戳 → 毫秒；兼容 '.' 作小数点以及位数不足的毫秒 (如 00:00:01,5)"""
+    h, m, rest = text.strip().split(":")
+    sec, _, frac = rest.replace(".", ",").partition(",")
+    return (int(h) * 3600 + int(m) * 60 + int(sec)) * 1000 + int((frac + "00")[:3])
+
+def parse_timing(line: str) -> tuple[int, int] | None:
+    """'00:00:01,000 --> 00:00:02,500' → (1000, 2500)；不是时间行则返回 None"""
+    start, sep, end = line.partition("-->")
+    if not sep:
+        return None
+    try:
+        # 结束时间后面可能跟着坐标等附加信息
+        return parse_timestamp(start), parse_timestamp(end.split()[0])
+    except (ValueError, IndexError):
+        return None
+
+# ─────────────────────────────────────────────
+#  SRT read / write
+# ─────────────────────────────────────────────
+
+def iter_srt(source):
+    """
+    逐行流式解析 SRT，逐条产出 (start_ms, end_ms, text)，内存占用与文件大小无关。
+    source 可以是路径或已打开的文本文件。多行字幕以 '\\n' 连接；
+    序号行可有可无，缺少空行分隔时也能按 "序号 + 时间行" 识别下一条。
+    """
+    f = open(source, encoding="utf-8-sig") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        timing, lines = None, []
+        for line in f:
+            line = line.rstrip("\r\n")
+            if timing is None:
+                timing = parse_timing(line) if "-->" in line else None
+                continue
+            if not line.strip():
+                yield timing[0], timing[1], "\n".join(lines)
+                timing, lines = None, []
+                continue
+            if "-->" in line:
+                next_timing = parse_timing(line)
+                if next_timing is not None:
+                    if lines and lines[-1].strip().isdigit():
+                        lines.pop()
+                    yield timing[0], timing[1], "\n".join(lines)
+                    timing, lines = next_timing, []
+                    continue
+            lines.append(line)
+        if timing is not None:
+            yield timing[0], timing[1], "\n".join(lines)
+    finally:
+        if f is not source:
+            f.close()
+
+def read_srt(source) -> list[tuple[int, int, str]]:
+    return list(iter_srt(source))
+
+def write_srt(path, cues) -> int:
+    """把任意可迭代的 (start_ms, end_ms, text) 流式写入 SRT，返回写入的条数"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for count, (start, end, text) in enumerate(cues, 1):
+            f.write(f"{count}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n")
+    return count
+
+# ─────────────────────────────────────────────
+#  Sentences
+# ─────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class SegmentRules:
+    """分句规则，0 表示不限制。句末标点总是断句。"""
+    max_duration_ms: int = 15000  # 单句最长时长
+    max_pause_ms: int = 1500      # 词间停顿达到此值即断句
+    max_chars: int = 0            # 单句最多字符数
+
+def is_sentence_end(word: str) -> bool:
+    clean = word.strip()
+    return bool(clean) and clean[-1] in SENTENCE_END_CHARS
+
+def is_soft_break(word: str) -> bool:
+    clean = word.strip()
+    return bool(clean) and clean[-1] in SOFT_BREAK_CHARS
+
+def _sentence(words: list) -> tuple[int, int, str]:
+    text = "".join(w.word for w in words).strip()
+    return seconds_to_ms(words[0].start), seconds_to_ms(words[-1].end), text
+
+def build_sentences(segments, rules: SegmentRules = SegmentRules()):
+    """
+    把 faster-whisper 的 segments (需 word_timestamps=True) 重新切分成句，
+    逐句产出 (start_ms, end_ms, text)。segments 可以是惰性生成器，边解码边出句。
+
+    断句条件：句末标点；与上一词的停顿 ≥ max_pause_ms；加入下一词会超过
+    max_duration_ms 或 max_chars。超限时若当前句中有逗号等软断点，就在最后一个
+    软断点处断开，剩余的词留到下一句；剩余部分仍超限则硬切，保证限额是真正的上限。
+    每个词只进出缓冲区一次，整体 O(词数)。
+    """
+    max_dur   = rules.max_duration_ms / 1000
+    max_pause = rules.max_pause_ms / 1000
+    words, chars, soft = [], 0, 0   # soft: 最后一个软断点之后的位置
+
+    def too_long(words, chars, word):
+        """加入 word 后是否超出时长或字符限额"""
+        return bool((max_dur and word.end - words[0].start > max_dur)
+                    or (rules.max_chars and chars + len(word.word) > rules.max_chars))
+
+    for segment in segments:
+        for word in segment.words:
+            if words and max_pause and word.start - words[-1].end >= max_pause:
+                yield _sentence(words)
+                words, chars, soft = [], 0, 0
+            if words and too_long(words, chars, word):
+                if soft:
+                    yield _sentence(words[:soft])
+                    words = words[soft:]
+                    chars, soft = sum(len(w.word) for w in words), 0
+                # 软断点之后剩下的词加上新词仍超限，则在此硬切
+                if words and too_long(words, chars, word):
+                    yield _sentence(words)
+                    words, chars = [], 0
+
+            words.append(word)
+            chars += len(word.word)
+            if is_sentence_end(word.word):
+                yield _sentence(words)
+                words, chars, soft = [], 0, 0
+            elif is_soft_break(word.word):
+                soft = len(words)
+    if words:
+        yield _sentence(words)
@@ -0,0 +1,202 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = []
+# ///
+# 为所有字幕文件建立全文索引 (SQLite FTS5)，支持短语搜索并返回 (文件, 句序号, 时间戳)。
+# 增量更新：只重新解析修改时间或大小变化过的 .srt，已删除的文件会从索引中移除。
+# 用法:
+#   uv run srt_index.py update <字幕文件夹> [...]   # 不带文件夹则重新扫描之前登记过的所有文件夹
+#   uv run srt_index.py search "how are you" [--limit 20]
+#   uv run player.py --search "how are you"         # 直接打开搜索结果播放
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+
+from srt_core import format_timestamp, iter_srt
+
+INDEX_DB = Path(__file__).resolve().parent / "srt_index.db"
+
+AUDIO_EXTS = (".mp3", ".m4a", ".wav", ".flac", ".ogg", ".aac")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path        TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS files (
+    id          INTEGER PRIMARY KEY,
+    srt_file    TEXT NOT NULL UNIQUE,
+    audio_file  TEXT,
+    mtime_ns    INTEGER NOT NULL,
+    size        INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cues (
+    id          INTEGER PRIMARY KEY,
+    file_id     INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    seg_index   INTEGER NOT NULL,
+    start_ms    INTEGER NOT NULL,
+    end_ms      INTEGER NOT NULL,
+    text        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cues_file ON cues (file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS cues_fts USING fts5 (
+    text, content='cues', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS cues_ai AFTER INSERT ON cues BEGIN
+    INSERT INTO cues_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS cues_ad AFTER DELETE ON cues BEGIN
+    INSERT INTO cues_fts (cues_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def find_audio(srt_file):
+    """同目录下与字幕同名的音频文件"""
+    stem = os.path.splitext(srt_file)[0]
+    for ext in AUDIO_EXTS:
+        for candidate in (stem + ext, stem + ext.upper()):
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def read_cues(srt_file):
+    """[(start_ms, end_ms, text)]，多行字幕合并为一行便于搜索和展示"""
+    return [(start, end, text.replace("\n", " ")) for start, end, text in iter_srt(srt_file)]
+
+
+class SrtIndex:
+    def __init__(self, db_path=INDEX_DB):
+        self.db = sqlite3.connect(db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def update(self, roots=None):
+        """
+        扫描文件夹 (递归)，只重建有变化的文件。返回 (新增或更新数, 删除数)。
+        roots 为空时扫描之前登记过的所有文件夹。
+        """
+        if roots:
+            roots = [os.path.abspath(r) for r in roots]
+            with self.db:
+                self.db.executemany("INSERT OR IGNORE INTO roots (path) VALUES (?)", [(r,) for r in roots])
+        else:
+            roots = [row["path"] for row in self.db.execute("SELECT path FROM roots")]
+
+        known = {row["srt_file"]: row for row in self.db.execute(
+            "SELECT id, srt_file, audio_file, mtime_ns, size FROM files")}
+        seen, changed = set(), 0
+
+        for root in roots:
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    if not name.lower().endswith(".srt"):
+                        continue
+                    srt_file = os.path.join(dirpath, name)
+                    seen.add(srt_file)
+                    st = os.stat(srt_file)
+                    row = known.get(srt_file)
+                    if row and row["mtime_ns"] == st.st_mtime_ns and row["size"] == st.st_size:
+                        self._relink_audio(row)
+                        continue
+                    try:
+                        cues = read_cues(srt_file)
+                    except Exception as e:
+                        print(f"⚠️  跳过无法解析的字幕 {srt_file}: {e}")
+                        continue
+                    self._replace_file(srt_file, st, cues)
+                    changed += 1
+
+        # 只清理属于本次扫描范围、但已不存在的文件
+        removed = [row["id"] for path, row in known.items()
+                   if path not in seen and any(path.startswith(r + os.sep) for r in roots)]
+        with self.db:
+            self.db.executemany("DELETE FROM cues WHERE file_id = ?", [(i,) for i in removed])
+            self.db.executemany("DELETE FROM files WHERE id = ?", [(i,) for i in removed])
+        return changed, len(removed)
+
+    def _relink_audio(self, row):
+        """字幕没变、但音频是建索引之后才放进来 (或已被删除) 时，重新查找同名音频"""
+        if row["audio_file"] and os.path.isfile(row["audio_file"]):
+            return
+        audio_file = find_audio(row["srt_file"])
+        if audio_file != row["audio_file"]:
+            with self.db:
+                self.db.execute("UPDATE files SET audio_file = ? WHERE id = ?", (audio_file, row["id"]))
+
+    def _replace_file(self, srt_file, st, cues):
+        with self.db:
+            row = self.db.execute("SELECT id FROM files WHERE srt_file = ?", (srt_file,)).fetchone()
+            if row:
+                file_id = row["id"]
+                self.db.execute("DELETE FROM cues WHERE file_id = ?", (file_id,))
+                self.db.execute("UPDATE files SET audio_file = ?, mtime_ns = ?, size = ? WHERE id = ?",
+                                (find_audio(srt_file), st.st_mtime_ns, st.st_size, file_id))
+            else:
+                file_id = self.db.execute(
+                    "INSERT INTO files (srt_file, audio_file, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                    (srt_file, find_audio(srt_file), st.st_mtime_ns, st.st_size),
+                ).lastrowid
+            self.db.executemany(
+                "INSERT INTO cues (file_id, seg_index, start_ms, end_ms, text) VALUES (?, ?, ?, ?, ?)",
+                [(file_id, i, start, end, text) for i, (start, end, text) in enumerate(cues)],
+            )
+
+    def search(self, query, limit=20, raw=False):
+        """
+        默认把整个查询当作一个短语；raw=True 时按 FTS5 查询语法解析 (AND / OR / NEAR / 前缀*)。
+        返回按相关度排序的行: srt_file, audio_file, seg_index, start_ms, end_ms, text。
+        """
+        match = query if raw else '"' + query.replace('"', '""') + '"'
+        return self.db.execute(
+            "SELECT f.srt_file, f.audio_file, c.seg_index, c.start_ms, c.end_ms, c.text "
+            "FROM cues_fts JOIN cues c ON c.id = cues_fts.rowid JOIN files f ON f.id = c.file_id "
+            "WHERE cues_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit),
+        ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕全文索引：增量建立索引并按短语搜索。")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_update = sub.add_parser("update", help="扫描文件夹并增量更新索引")
+    p_update.add_argument("folders", nargs="*", help="字幕所在文件夹 (默认: 之前登记过的所有文件夹)")
+    p_search = sub.add_parser("search", help="搜索短语")
+    p_search.add_argument("query")
+    p_search.add_argument("--limit", type=int, default=20)
+    p_search.add_argument("--raw", action="store_true", help="按 FTS5 查询语法解析，而不是整句短语")
+    args = parser.parse_args()
+
+    index = SrtIndex()
+    try:
+        if args.command == "update":
+            started = time.perf_counter()
+            changed, removed = index.update(args.folders)
+            print(f"✅ 索引已更新：{changed} 个文件重建，{removed} 个文件移除 ({time.perf_counter() - started:.2f}s)")
+        else:
+            started = time.perf_counter()
+            hits = index.search(args.query, args.limit, args.raw)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for hit in hits:
+                print(f"{hit['srt_file']}:{hit['seg_index'] + 1}  "
+                      f"[{format_timestamp(hit['start_ms'])} → {format_timestamp(hit['end_ms'])}]  {hit['text']}")
+            print(f"── {len(hits)} 条结果 ({elapsed_ms:.1f} ms)")
+    except sqlite3.OperationalError as e:
+        print(f"❌ 查询出错: {e}")
+        sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
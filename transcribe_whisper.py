@@ -8,15 +8,22 @@
 # ///
 
 import os
+import re
 import sys
+import time
+import argparse
 from pathlib import Path
 from urllib.parse import urlparse
 from urllib.request import urlretrieve
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 import questionary
 from questionary import Style
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+
+from srt_core import SegmentRules, build_sentences, format_timestamp, write_srt
+from calibrate_whisper import DEFAULT_TARGET_RTF, load_profile, pick_config
+from whisper_metrics import METRICS_DIR, RunMetrics
 
 # ─────────────────────────────────────────────
 #  Constants
@@ -24,7 +31,7 @@ from faster_whisper import WhisperModel
 
 MODEL_DIR = Path(__file__).resolve().parent / "models"
 
-SENTENCE_END_CHARS = {'.', '?', '!', '。', '？', '！', '…'}
+DEFAULT_COMPARE_BATCH_SIZE = 8
 
 MODELS = [
     ("tiny",     "· 最快，精度较低"),
@@ -74,6 +81,9 @@ class TranscribeConfig:
     model_size: str
     device: str
     compute_type: str
+    batch_size: int = 0   # 0 = 逐段顺序解码 VAD 片段
+    cpu_threads: int = 0  # 0 = 由 CTranslate2 自行决定
+    num_workers: int = 1
 
 # ─────────────────────────────────────────────
 #  Helpers
@@ -86,16 +96,20 @@ def model_label(name: str, desc: str) -> str:
     badge = "✓ 已下载" if is_model_cached(name) else "↓ 需下载"
     return f"{name:<12}{desc}  [{badge}]"
 
-def is_sentence_end(word: str) -> bool:
-    clean = word.strip()
-    return bool(clean) and clean[-1] in SENTENCE_END_CHARS
-
-def format_timestamp(seconds: float) -> str:
-    ms = int((seconds % 1) * 1000)
-    s  = int(seconds)
-    m, s = divmod(s, 60)
-    h, m = divmod(m, 60)
-    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+def normalize_words(text: str) -> list[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_error_rate(reference: list[str], hypothesis: list[str]) -> float:
+    """词级编辑距离 / 参考词数 (两行滚动 DP)"""
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    prev = list(range(len(hypothesis) + 1))
+    for i, ref in enumerate(reference, 1):
+        curr = [i] + [0] * len(hypothesis)
+        for j, hyp in enumerate(hypothesis, 1):
+            curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + (ref != hyp))
+        prev = curr
+    return prev[-1] / len(reference)
 
 def select(prompt: str, options: list[tuple], default: str, label_fn=None) -> str:
     fmt = label_fn or (lambda n, d: f"{n:<14}{d}")
@@ -113,12 +127,31 @@ def select(prompt: str, options: list[tuple], default: str, label_fn=None) -> st
 #  Steps
 # ─────────────────────────────────────────────
 
-def parse_audio_file() -> str:
-    if len(sys.argv) < 2:
-        print("❌ 错误：未指定音频文件。")
-        print(f"用法: uv run {os.path.basename(__file__)} <音频文件路径 或 URL>")
-        sys.exit(1)
-    src = sys.argv[1]
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Whisper 字幕生成器")
+    parser.add_argument("audio", help="音频文件路径 或 URL")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="批量推理：每批解码的 VAD 片段数 (默认 0 = 顺序推理)")
+    parser.add_argument("--compare", action="store_true",
+                        help="在该音频上对比顺序与批量推理的实时率和 WER 偏差，不生成字幕")
+    parser.add_argument("--auto", action="store_true",
+                        help="跳过选择步骤，按 calibrate_whisper.py 生成的本机档案自动配置")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF,
+                        help=f"--auto 时的目标实时率 (默认 {DEFAULT_TARGET_RTF})")
+    seg = parser.add_argument_group("分句规则 (0 = 不限制，句末标点总是断句)")
+    seg.add_argument("--max-duration", type=float, default=SegmentRules.max_duration_ms / 1000,
+                     help="单句最长秒数 (默认 %(default)s)")
+    seg.add_argument("--max-pause", type=float, default=SegmentRules.max_pause_ms / 1000,
+                     help="词间停顿超过该秒数即断句 (默认 %(default)s)")
+    seg.add_argument("--max-chars", type=int, default=SegmentRules.max_chars,
+                     help="单句最多字符数 (默认 %(default)s)")
+    parser.add_argument("--metrics-dir", default=str(METRICS_DIR),
+                        help="每次运行的 JSON Lines 统计文件目录 (默认 metrics/)")
+    parser.add_argument("--prom-file",
+                        help="额外写出 Prometheus textfile (如 node_exporter 的 textfile 目录下的 .prom 文件)")
+    return parser.parse_args()
+
+def parse_audio_file(src: str) -> str:
     if src.startswith(("http://", "https://")):
         dest = Path("downloads") / Path(urlparse(src).path).name
         dest.parent.mkdir(exist_ok=True)
@@ -127,7 +160,7 @@ def parse_audio_file() -> str:
         return str(dest)
     return src
 
-def prompt_config(audio_file: str) -> TranscribeConfig:
+def prompt_config(audio_file: str, batch_size: int = 0) -> TranscribeConfig:
     print("\n  🎙  \033[1mWhisper 字幕生成器\033[0m\n")
     model_size   = select("① 选择模型大小", 
                             MODELS, 
@@ -142,15 +175,29 @@ def prompt_config(audio_file: str) -> TranscribeConfig:
         default="int8" if device == "cpu" else "float16",
     )
 
-    return TranscribeConfig(audio_file, model_size, device, compute_type)
+    return TranscribeConfig(audio_file, model_size, device, compute_type, batch_size)
+
+def auto_config(audio_file: str, batch_size: int, target_rtf: float) -> TranscribeConfig | None:
+    profile = load_profile()
+    best = pick_config(profile, target_rtf) if profile else None
+    if best is None:
+        print("⚠️  未找到本机校准档案，请先运行 calibrate_whisper.py。改为手动选择。")
+        return None
+    print(f"\n  ⚙️  按本机档案自动配置 (目标 RTF ≤ {target_rtf}，实测 RTF {best['rtf']:.3f})")
+    return TranscribeConfig(audio_file, best["model_size"], best["device"], best["compute_type"],
+                            batch_size, best["cpu_threads"], best["num_workers"])
 
 def confirm_config(cfg: TranscribeConfig) -> None:
     filename = os.path.basename(cfg.audio_file)
+    mode     = f"批量 ×{cfg.batch_size}" if cfg.batch_size > 0 else "顺序"
+    threads  = f"{cfg.cpu_threads or '自动'} 线程 / {cfg.num_workers} worker"
     print(f"""
   ╭─────────────────────────────────╮
   │  模型  {cfg.model_size:<28}│
   │  设备  {cfg.device:<28}│
   │  精度  {cfg.compute_type:<28}│
+  │  推理  {mode:<28}│
+  │  并行  {threads:<28}│
   │  文件  {filename:<28}│
   ╰─────────────────────────────────╯""")
     ok = questionary.confirm("  确认开始转录？", default=True, style=PROMPT_STYLE).ask()
@@ -159,59 +206,115 @@ def confirm_config(cfg: TranscribeConfig) -> None:
         sys.exit(0)
 
 
-def transcribe(cfg: TranscribeConfig) -> list[dict]:
+def load_model(cfg: TranscribeConfig) -> WhisperModel:
     print(f"\n🚀 正在加载模型 {cfg.model_size} ({cfg.device} / {cfg.compute_type})…")
     MODEL_DIR.mkdir(parents=True, exist_ok=True)
-    model = WhisperModel(cfg.model_size, device=cfg.device, compute_type=cfg.compute_type,
-                         download_root=str(MODEL_DIR))
+    return WhisperModel(cfg.model_size, device=cfg.device, compute_type=cfg.compute_type,
+                        cpu_threads=cfg.cpu_threads, num_workers=cfg.num_workers,
+                        download_root=str(MODEL_DIR))
+
+def run_inference(model: WhisperModel, cfg: TranscribeConfig, audio=None):
+    """
+    batch_size > 0 时用 BatchedInferencePipeline 把多个 VAD 片段拼成一批解码，
+    否则逐段顺序解码。两条路径都保留词级时间戳，供 build_sentences 使用。
+    调用本身会同步完成 VAD、特征提取和语言检测；返回的 segments 是惰性生成器，
+    真正的解码发生在迭代时。audio 可传入已解码的波形，省去再次读文件。
+    """
+    source = cfg.audio_file if audio is None else audio
+    if cfg.batch_size > 0:
+        pipeline = BatchedInferencePipeline(model=model)
+        return pipeline.transcribe(source, batch_size=cfg.batch_size, beam_size=5,
+                                   word_timestamps=True, vad_filter=True)
+    return model.transcribe(source, beam_size=5, word_timestamps=True, vad_filter=True)
+
+def transcribe(cfg: TranscribeConfig, metrics: RunMetrics, rules: SegmentRules) -> list[tuple[int, int, str]]:
+    with metrics.stage("model_load"):
+        model = load_model(cfg)
 
     print("🎙️  正在转录，请稍候…\n")
-    segments, info = model.transcribe(cfg.audio_file, beam_size=5, word_timestamps=True, vad_filter=True)
+    sampling_rate = model.feature_extractor.sampling_rate
+    with metrics.stage("audio_decode"):
+        audio = decode_audio(cfg.audio_file, sampling_rate=sampling_rate)
+    metrics.set_audio_duration(len(audio) / sampling_rate)
+
+    # transcribe() 同步完成 VAD、特征提取和语言检测 (含一次编码器前向)，不只是 VAD
+    with metrics.stage("prepare"):
+        segments, info = run_inference(model, cfg, audio)
     print(f"  检测语言: {info.language}  (置信度 {info.language_probability:.0%})")
     print("─" * 52)
-    return build_sentences(segments)
+    with metrics.stage("inference"):
+        return collect_sentences(metrics.count_audio(segments), rules)
 
 
-def build_sentences(segments) -> list[dict]:
-    def flush_sentence(words: list) -> dict:
-        start = words[0].start
-        end   = words[-1].end
-        text  = "".join(w.word for w in words).strip()
+def collect_sentences(segments, rules: SegmentRules) -> list[tuple[int, int, str]]:
+    """边解码边分句，逐句打印进度"""
+    sentences = []
+    for start, end, text in build_sentences(segments, rules):
         print(f"  [{format_timestamp(start)} → {format_timestamp(end)}] {text}")
-        return {"start": start, "end": end, "text": text}
-
-    sentences, current_words = [], []
-    for segment in segments:
-        for word in segment.words:
-            current_words.append(word)
-            if is_sentence_end(word.word):
-                sentences.append(flush_sentence(current_words))
-                current_words = []
-    if current_words:
-        sentences.append(flush_sentence(current_words))
+        sentences.append((start, end, text))
     return sentences
 
-def export_srt(sentences: list[dict], audio_file: str) -> str:
+def export_srt(sentences: list[tuple[int, int, str]], audio_file: str) -> str:
     srt_path = os.path.splitext(audio_file)[0] + ".srt"
-    with open(srt_path, "w", encoding="utf-8") as f:
-        for i, s in enumerate(sentences, 1):
-            f.write(f"{i}\n{format_timestamp(s['start'])} --> {format_timestamp(s['end'])}\n{s['text']}\n\n")
+    write_srt(srt_path, sentences)
     return srt_path
 
+def compare_modes(cfg: TranscribeConfig) -> None:
+    """
+    在同一模型、同一音频上分别跑顺序与批量推理，报告实时率 (RTF = 耗时 / 音频时长)
+    以及批量结果相对顺序结果的 WER 偏差。模型加载和音频解码时间不计入。
+    """
+    model      = load_model(cfg)
+    audio      = decode_audio(cfg.audio_file, sampling_rate=model.feature_extractor.sampling_rate)
+    batch_size = cfg.batch_size or DEFAULT_COMPARE_BATCH_SIZE
+    runs       = []
+    for label, size in (("顺序", 0), (f"批量 ×{batch_size}", batch_size)):
+        print(f"⏱️  {label} 推理中…")
+        started = time.perf_counter()
+        segments, info = run_inference(model, replace(cfg, batch_size=size), audio)
+        text = " ".join(text for _, _, text in build_sentences(segments))
+        elapsed = time.perf_counter() - started
+        words = normalize_words(text)
+        runs.append((label, elapsed, elapsed / info.duration, words))
+
+    reference = runs[0][3]
+    print("─" * 52)
+    print(f"  {'模式':<12}{'耗时':>10}{'RTF':>10}{'词数':>8}{'WER 偏差':>12}")
+    for label, elapsed, rtf, words in runs:
+        drift = word_error_rate(reference, words)
+        print(f"  {label:<12}{elapsed:>9.1f}s{rtf:>10.3f}{len(words):>8}{drift:>12.2%}")
+    print("─" * 52)
+    print(f"  加速比: {runs[0][1] / runs[1][1]:.2f}×\n")
+
 # ─────────────────────────────────────────────
 #  Entry point
 # ─────────────────────────────────────────────
 
 def main():
     
-    audio_file = parse_audio_file()
-    cfg        = prompt_config(audio_file)
+    args       = parse_args()
+    audio_file = parse_audio_file(args.audio)
+    cfg        = (args.auto and auto_config(audio_file, args.batch_size, args.target_rtf)) \
+                 or prompt_config(audio_file, args.batch_size)
     confirm_config(cfg)
-    sentences  = transcribe(cfg)
-    srt_path   = export_srt(sentences, audio_file)
+    if args.compare:
+        compare_modes(cfg)
+        return
+
+    rules   = SegmentRules(round(args.max_duration * 1000), round(args.max_pause * 1000), args.max_chars)
+    metrics = RunMetrics(audio_file, args.metrics_dir, args.prom_file)
+    try:
+        sentences = transcribe(cfg, metrics, rules)
+        with metrics.stage("srt_write"):
+            srt_path = export_srt(sentences, audio_file)
+    except BaseException:
+        metrics.close("error")
+        raise
+    metrics.close()
 
     print("─" * 52)
-    print(f"✅ 完成！字幕已保存至: {srt_path}\n")
+    print(f"✅ 完成！字幕已保存至: {srt_path}")
+    print(f"📊 运行统计: {metrics.path}\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,133 @@
+# 转录流程的轻量级资源统计：每个阶段记录墙钟时间、CPU 时间和峰值内存，
+# 每次运行写一个 JSON Lines 文件，可选地输出 Prometheus textfile 供 node_exporter 抓取。
+# 仅依赖标准库，transcribe_whisper.py 与 batch_transcribe.sh 的内嵌脚本共用。
+
+import os
+import sys
+import json
+import time
+import resource
+from pathlib import Path
+from contextlib import contextmanager
+
+METRICS_DIR = Path(__file__).resolve().parent / "metrics"
+
+PROM_PREFIX = "repeatling_transcribe"
+PROM_INTERVAL_S = 1.0   # 实时计数器写入 textfile 的最小间隔
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RunMetrics:
+    """
+    用法:
+        metrics = RunMetrics(audio_file, prom_file="/var/lib/node_exporter/whisper.prom")
+        with metrics.stage("model_load"):
+            ...
+        for seg in metrics.count_audio(segments):
+            ...
+        metrics.close()
+
+    peak_rss_bytes 是阶段结束时进程的历史峰值 (ru_maxrss 只增不减)，
+    相邻阶段之差即为该阶段新增的内存高水位。
+    """
+
+    def __init__(self, audio_file: str, metrics_dir: Path | str = METRICS_DIR,
+                 prom_file: str | None = None):
+        self.audio_file      = audio_file
+        self.prom_file       = prom_file
+        self.stages          = {}
+        self.audio_seconds   = 0.0
+        self.audio_duration  = 0.0
+        self._started        = time.perf_counter()
+        self._last_prom      = 0.0
+
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{Path(audio_file).stem}"
+        metrics_dir = Path(metrics_dir)
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        self.path = metrics_dir / f"{run_id}.jsonl"
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._emit({"event": "start", "audio_file": audio_file, "pid": os.getpid()})
+
+    def _emit(self, record: dict) -> None:
+        record = {"ts": round(time.time(), 3), **record}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    @contextmanager
+    def stage(self, name: str):
+        wall, cpu = time.perf_counter(), time.process_time()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            record = {
+                "wall_s":         round(time.perf_counter() - wall, 4),
+                "cpu_s":          round(time.process_time() - cpu, 4),
+                "peak_rss_bytes": peak_rss_bytes(),
+            }
+            self.stages[name] = record
+            self._emit({"event": "stage", "stage": name, "status": status, **record})
+            self.write_prom()
+
+    def set_audio_duration(self, seconds: float) -> None:
+        self.audio_duration = seconds
+
+    def add_audio_seconds(self, seconds: float) -> None:
+        self.audio_seconds += seconds
+        if time.perf_counter() - self._last_prom >= PROM_INTERVAL_S:
+            self.write_prom()
+
+    def count_audio(self, segments):
+        """透传 segments 生成器，同时按片段结束时间累加已处理的音频秒数"""
+        position = 0.0
+        for segment in segments:
+            if segment.end > position:
+                self.add_audio_seconds(segment.end - position)
+                position = segment.end
+            yield segment
+
+    def write_prom(self) -> None:
+        if not self.prom_file:
+            return
+        self._last_prom = time.perf_counter()
+        label = self.audio_file.replace("\\", "\\\\").replace('"', '\\"')
+        lines = [
+            f"# TYPE {PROM_PREFIX}_audio_seconds_processed_total counter",
+            f'{PROM_PREFIX}_audio_seconds_processed_total{{file="{label}"}} {self.audio_seconds:.3f}',
+            f"# TYPE {PROM_PREFIX}_audio_duration_seconds gauge",
+            f'{PROM_PREFIX}_audio_duration_seconds{{file="{label}"}} {self.audio_duration:.3f}',
+        ]
+        for metric, key in (("stage_wall_seconds", "wall_s"), ("stage_cpu_seconds", "cpu_s"),
+                            ("stage_peak_rss_bytes", "peak_rss_bytes")):
+            lines.append(f"# TYPE {PROM_PREFIX}_{metric} gauge")
+            lines += [f'{PROM_PREFIX}_{metric}{{file="{label}",stage="{stage}"}} {rec[key]}'
+                      for stage, rec in self.stages.items()]
+        # 先写临时文件再替换，避免抓取到写了一半的内容
+        tmp = f"{self.prom_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.prom_file)
+
+    def close(self, status: str = "ok") -> None:
+        if self._file.closed:
+            return
+        wall = time.perf_counter() - self._started
+        self._emit({
+            "event":          "end",
+            "status":         status,
+            "wall_s":         round(wall, 4),
+            "audio_seconds":  round(self.audio_seconds, 3),
+            "audio_duration": round(self.audio_duration, 3),
+            "rtf":            round(wall / self.audio_duration, 4) if self.audio_duration else None,
+            "peak_rss_bytes": peak_rss_bytes(),
+        })
+        self.write_prom()
+        self._file.close()